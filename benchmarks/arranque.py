@@ -0,0 +1,75 @@
+# Medición del arranque de lector.py: desglose de -X importtime y tiempo hasta la primera ventana
+#
+# Uso: python benchmarks/arranque.py [REPETICIONES]
+# El tiempo hasta la primera ventana se mide desde que se lanza el proceso hasta que lector.py,
+# con LECTOR_MEDIR_ARRANQUE=1, avisa que la ventana principal ya está dibujada (necesita pantalla).
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LECTOR = os.path.join(RAIZ_REPO, "lector.py")
+MOSTRAR = 15
+
+
+# Tiempo acumulado (µs) de "import lector" y de cada paquete que importa directamente
+def desglose_importtime():
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import lector"],
+        cwd=RAIZ_REPO, capture_output=True, text=True, check=True,
+    )
+    # Cada línea: "import time: propio | acumulado | nombre", con dos espacios de sangría por
+    # nivel. Los hijos se imprimen antes que el padre, así que el bloque de lector son las
+    # líneas entre el import de primer nivel anterior y la línea de lector.
+    bloque = []
+    total = 0
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        nivel = (len(nombre) - len(nombre.lstrip(" ")) - 1) // 2
+        if nivel == 0:
+            if nombre.strip() == "lector":
+                total = int(acumulado)
+                break
+            bloque = []
+        elif nivel == 1:
+            bloque.append((nombre.strip().split(".")[0], int(acumulado)))
+
+    paquetes = {}
+    for paquete, acumulado in bloque:
+        paquetes[paquete] = paquetes.get(paquete, 0) + acumulado
+    return total, paquetes
+
+
+def tiempo_primera_ventana():
+    entorno = dict(os.environ, LECTOR_MEDIR_ARRANQUE="1")
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen([sys.executable, LECTOR], cwd=RAIZ_REPO, env=entorno, stdout=subprocess.PIPE, text=True)
+    linea = proceso.stdout.readline()
+    transcurrido = time.perf_counter() - inicio
+    proceso.wait()
+    if "ventana lista" not in linea:
+        raise RuntimeError("lector.py no llegó a mostrar la ventana")
+    return transcurrido
+
+
+def main(repeticiones):
+    total, paquetes = desglose_importtime()
+    print(f"import lector: {total / 1000:.1f} ms en total")
+    for paquete, microsegundos in sorted(paquetes.items(), key=lambda item: -item[1])[:MOSTRAR]:
+        print(f"  {paquete:<20} {microsegundos / 1000:>8.1f} ms")
+
+    try:
+        tiempos = [tiempo_primera_ventana() for _ in range(repeticiones)]
+    except Exception as e:
+        print(f"Tiempo hasta la primera ventana: no se pudo medir ({e})")
+        return
+    print(f"Tiempo hasta la primera ventana: mediana {statistics.median(tiempos) * 1000:.0f} ms "
+          f"(mín. {min(tiempos) * 1000:.0f} ms, {repeticiones} repeticiones)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
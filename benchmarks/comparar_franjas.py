@@ -0,0 +1,57 @@
+# Análisis por franjas (obtener_porcentaje_color_franjas) contra renderizar la página entera
+# (obtener_histograma_color)
+#
+# Uso: python benchmarks/comparar_franjas.py [DPI] [SENSIBILIDAD]
+# Con las bandas de precios.json informa, por documento del corpus, ms/página de cada camino y
+# cuántas páginas se cortaron antes de la última franja. Falla si alguna página queda en otra
+# banda que con la página entera.
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from corpus import generar_corpus
+
+import lector
+
+
+def medir(paginas, camino):
+    resultados = []
+    inicio = time.perf_counter()
+    for pagina in paginas:
+        resultados.append(camino(pagina))
+    return resultados, (time.perf_counter() - inicio) * 1000 / len(paginas)
+
+
+def main(dpi, sensibilidad):
+    umbrales = lector.tabla_precios.umbrales_color
+    cambios_banda = 0
+    print(f"{dpi} DPI, sensibilidad {sensibilidad}, {lector.FRANJAS} franjas")
+    print(f"{'documento':<12} {'páginas':>8} {'entera ms':>10} {'franjas ms':>11} {'aceleración':>12} {'cortadas':>9} {'cambian banda':>14}")
+    for ruta in generar_corpus():
+        with fitz.open(ruta) as doc:
+            paginas = list(doc)
+            entera, ms_entera = medir(
+                paginas, lambda pagina: float(lector.fraccion_desde_histograma(lector.obtener_histograma_color(pagina, dpi), sensibilidad))
+            )
+            franjas, ms_franjas = medir(
+                paginas, lambda pagina: lector.obtener_porcentaje_color_franjas(pagina, umbrales, dpi, sensibilidad)
+            )
+            del paginas
+
+        bandas_entera, _ = lector.tabla_precios.bandas_color(np.array(entera))
+        bandas_franjas, _ = lector.tabla_precios.bandas_color(np.array([minimo for _, minimo, _ in franjas]))
+        cortadas = sum(1 for _, minimo, maximo in franjas if maximo > minimo)
+        cambian = int(np.count_nonzero(bandas_entera != bandas_franjas))
+        cambios_banda += cambian
+        print(f"{os.path.basename(ruta):<12} {len(entera):>8} {ms_entera:>10.2f} {ms_franjas:>11.2f} "
+              f"{ms_entera / ms_franjas:>11.1f}x {cortadas:>9} {cambian:>14}")
+    return 1 if cambios_banda else 0
+
+
+if __name__ == "__main__":
+    dpi = int(sys.argv[1]) if len(sys.argv) > 1 else lector.dpi_color
+    sensibilidad = int(sys.argv[2]) if len(sys.argv) > 2 else lector.sensitivity
+    sys.exit(main(dpi, sensibilidad))
@@ -0,0 +1,91 @@
+# Comparación del conteo de píxeles de color por croma entero contra el camino HSV de OpenCV
+#
+# Uso: python benchmarks/comparar_kernel_croma.py [DPI] [SENSIBILIDAD]
+# Referencia: cv2.cvtColor(RGB2HSV) + cv2.inRange sobre S y V + conteo de la máscara.
+# El script falla si el kernel se aleja de la referencia más de TOLERANCIA en alguna página.
+#
+# El histograma de min(S, V) (lector.histograma_color) tiene que contar exactamente los mismos
+# píxeles que el kernel para cualquier sensibilidad; si no, el script también falla.
+#
+# También informa la diferencia contra el umbral anterior, que además exigía H >= sensibilidad
+# y por eso dejaba afuera los rojos, naranjas y amarillos (H < 50 con la sensibilidad por defecto).
+import sys
+import time
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from corpus import generar_corpus
+
+import lector
+
+# OpenCV calcula S con aritmética de punto fijo; en los empates de redondeo puede diferir en 1
+TOLERANCIA = 0.001
+
+
+def hsv_s_v(img_rgb, sensibilidad):
+    hsv = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2HSV)
+    mask = cv2.inRange(hsv, np.array([0, sensibilidad, sensibilidad]), np.array([179, 255, 255]))
+    return np.count_nonzero(mask)
+
+
+def hsv_anterior(img_rgb, sensibilidad):
+    hsv = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2HSV)
+    mask = cv2.inRange(hsv, np.array([sensibilidad] * 3), np.array([179, 255, 255]))
+    return np.count_nonzero(mask)
+
+
+def histograma(img_rgb, sensibilidad):
+    return int(lector.histograma_color(img_rgb)[sensibilidad:].sum())
+
+
+# Alternativa al plegado de cv2.calcHist: np.bincount sobre la tabla indexada con V * 256 + croma
+def histograma_bincount(img_rgb, sensibilidad):
+    maximo, croma = lector.maximo_y_croma(img_rgb)
+    clave = (maximo.astype(np.uint16) << 8) | croma
+    return int(np.bincount(lector.tabla_saturacion_valor().ravel()[clave.ravel()], minlength=256)[sensibilidad:].sum())
+
+
+CAMINOS = {
+    "HSV (S y V)": hsv_s_v,
+    "HSV anterior (H, S y V)": hsv_anterior,
+    "kernel de croma": lector.contar_pixeles_color,
+    "histograma min(S, V)": histograma,
+    "histograma con bincount": histograma_bincount,
+}
+
+
+def main(dpi, sensibilidad):
+    zoom = dpi / 72
+    imagenes = []
+    for ruta in generar_corpus():
+        with fitz.open(ruta) as doc:
+            for pagina in doc:
+                pix = pagina.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+                img, pix = lector.pixmap_a_rgb(pix)
+                # Copia: la vista no mantiene vivo el buffer del pixmap, que se libera en la vuelta siguiente
+                imagenes.append(img.copy())
+
+    fracciones = {}
+    print(f"{len(imagenes)} páginas a {dpi} DPI, sensibilidad {sensibilidad}")
+    for nombre, contar in CAMINOS.items():
+        inicio = time.perf_counter()
+        fracciones[nombre] = [contar(img, sensibilidad) / (img.shape[0] * img.shape[1]) for img in imagenes]
+        ms_pagina = (time.perf_counter() - inicio) * 1000 / len(imagenes)
+        print(f"{nombre:<26} {ms_pagina:>8.3f} ms/página")
+
+    kernel = fracciones["kernel de croma"]
+    dif_referencia = max(abs(a - b) for a, b in zip(kernel, fracciones["HSV (S y V)"]))
+    dif_anterior = max(abs(a - b) for a, b in zip(kernel, fracciones["HSV anterior (H, S y V)"]))
+    print(f"Diferencia máxima por página contra HSV (S y V): {dif_referencia:.5f} (tolerancia {TOLERANCIA})")
+    print(f"Diferencia máxima por página contra el umbral anterior con H: {dif_anterior:.5f}")
+    histograma_igual = fracciones["histograma min(S, V)"] == kernel == fracciones["histograma con bincount"]
+    print(f"Histograma igual al kernel en todas las páginas: {'sí' if histograma_igual else 'NO'}")
+    return 0 if dif_referencia <= TOLERANCIA and histograma_igual else 1
+
+
+if __name__ == "__main__":
+    dpi = int(sys.argv[1]) if len(sys.argv) > 1 else lector.dpi_color
+    sensibilidad = int(sys.argv[2]) if len(sys.argv) > 2 else lector.sensitivity
+    sys.exit(main(dpi, sensibilidad))
@@ -0,0 +1,54 @@
+# Comparación precisión vs velocidad del análisis de color (obtener_histograma_color) a distintas
+# resoluciones de análisis
+#
+# Uso: python benchmarks/comparar_resolucion.py [DPI ...]
+# Toma como referencia la resolución completa (72 DPI) y falla si alguna resolución
+# se aleja más de la tolerancia declarada en TOLERANCIA_PAGINA / TOLERANCIA_TRABAJO.
+import sys
+import time
+
+import fitz  # PyMuPDF
+
+from corpus import generar_corpus
+
+import lector
+
+DPI_REFERENCIA = 72
+TOLERANCIA_PAGINA = 0.02  # Diferencia máxima de fracción de color en una página
+TOLERANCIA_TRABAJO = 0.005  # Diferencia máxima del promedio de color de todo el trabajo
+
+
+def medir(rutas, dpi):
+    porcentajes = []
+    inicio = time.perf_counter()
+    for ruta in rutas:
+        with fitz.open(ruta) as doc:
+            porcentajes.extend(
+                float(lector.fraccion_desde_histograma(lector.obtener_histograma_color(pagina, dpi), lector.sensitivity))
+                for pagina in doc
+            )
+    return porcentajes, time.perf_counter() - inicio
+
+
+def main(resoluciones):
+    rutas = generar_corpus()
+    referencia, tiempo_referencia = medir(rutas, DPI_REFERENCIA)
+    promedio_referencia = sum(referencia) / len(referencia)
+    print(f"{'DPI':>5} {'seg':>8} {'acel.':>6} {'dif. máx pág.':>14} {'dif. promedio':>14}")
+    print(f"{DPI_REFERENCIA:>5} {tiempo_referencia:>8.3f} {1:>6.2f} {0:>14.4f} {0:>14.4f}")
+
+    fuera_de_tolerancia = False
+    for dpi in resoluciones:
+        porcentajes, tiempo = medir(rutas, dpi)
+        dif_pagina = max(abs(a - b) for a, b in zip(porcentajes, referencia))
+        dif_trabajo = abs(sum(porcentajes) / len(porcentajes) - promedio_referencia)
+        print(f"{dpi:>5} {tiempo:>8.3f} {tiempo_referencia / tiempo:>6.2f} {dif_pagina:>14.4f} {dif_trabajo:>14.4f}")
+        if dif_pagina > TOLERANCIA_PAGINA or dif_trabajo > TOLERANCIA_TRABAJO:
+            fuera_de_tolerancia = True
+
+    return 1 if fuera_de_tolerancia else 0
+
+
+if __name__ == "__main__":
+    resoluciones = [int(dpi) for dpi in sys.argv[1:]] or [48, lector.dpi_color, 24]
+    sys.exit(main(resoluciones))
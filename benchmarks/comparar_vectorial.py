@@ -0,0 +1,56 @@
+# Revisión vectorial (pagina_es_monocromatica) contra renderizar siempre
+#
+# Uso: python benchmarks/comparar_vectorial.py [PDF ...]
+# Por documento (por defecto, el corpus de benchmarks/corpus.py) informa en ms/página lo que
+# cuesta la revisión sola, renderizar siempre y armar el histograma, y el análisis de una página
+# como lo hace el programa (analizar_pagina_con_tamano: la revisión y, si no alcanza, el render).
+# Falla si alguna página que la revisión da por gris tiene color al renderizarla.
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+
+from corpus import generar_corpus
+
+import lector
+
+REPETICIONES = 5
+
+
+# Mejor de REPETICIONES pasadas, en ms por página
+def medir(paginas, funcion):
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        resultados = [funcion(pagina) for pagina in paginas]
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return resultados, mejor * 1000 / len(paginas)
+
+
+def siempre_render(pagina, dpi, sensibilidad):
+    histograma = lector.obtener_histograma_color(pagina, dpi)
+    return float(lector.fraccion_desde_histograma(histograma, sensibilidad))
+
+
+def main(rutas):
+    dpi, sensibilidad = lector.dpi_color, lector.sensitivity
+    con_color_mal = 0
+    print(f"{dpi} DPI, sensibilidad {sensibilidad}, mejor de {REPETICIONES}, ms/página")
+    print(f"{'documento':<18} {'páginas':>8} {'grises':>7} {'revisión':>9} {'siempre render':>15} {'programa':>9}")
+    for ruta in rutas:
+        with fitz.open(ruta) as doc:
+            paginas = list(doc)
+            grises, ms_revision = medir(paginas, lector.pagina_es_monocromatica)
+            fracciones, ms_render = medir(paginas, lambda pagina: siempre_render(pagina, dpi, sensibilidad))
+            _, ms_programa = medir(paginas, lambda pagina: lector.analizar_pagina_con_tamano(pagina, dpi, sensibilidad))
+            del paginas
+        con_color_mal += sum(1 for gris, fraccion in zip(grises, fracciones) if gris and fraccion > 0)
+        print(f"{os.path.basename(ruta):<18} {len(grises):>8} {sum(grises):>7} {ms_revision:>9.3f} {ms_render:>15.3f} {ms_programa:>9.3f}")
+    if con_color_mal:
+        print(f"{con_color_mal} páginas dadas por grises tienen color")
+    return 1 if con_color_mal else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:] or generar_corpus()))
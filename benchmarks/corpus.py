@@ -0,0 +1,149 @@
+# Generador de un corpus sintético y reproducible de PDFs para las mediciones de benchmarks/
+import os
+import sys
+
+import fitz  # PyMuPDF
+import numpy as np
+
+# Permitir "import lector" desde los scripts de esta carpeta
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_REPO not in sys.path:
+    sys.path.insert(0, RAIZ_REPO)
+
+CARPETA_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+SEMILLA = 1234
+
+TEXTO = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+    "exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat."
+)
+
+
+def _pagina_texto(doc, rng):
+    pagina = doc.new_page()
+    y = 72
+    while y < pagina.rect.height - 72:
+        pagina.insert_text((72, y), TEXTO[: rng.integers(40, len(TEXTO))], fontsize=10)
+        y += 14
+    return pagina
+
+
+def _pagina_color(doc, rng):
+    # Texto negro con algunos rectángulos de color de área variable
+    pagina = _pagina_texto(doc, rng)
+    for _ in range(rng.integers(1, 6)):
+        ancho = rng.uniform(20, pagina.rect.width / 2)
+        alto = rng.uniform(20, pagina.rect.height / 3)
+        x0 = rng.uniform(0, pagina.rect.width - ancho)
+        y0 = rng.uniform(0, pagina.rect.height - alto)
+        color = tuple(float(c) for c in rng.uniform(0, 1, 3))
+        pagina.draw_rect(fitz.Rect(x0, y0, x0 + ancho, y0 + alto), color=color, fill=color)
+    return pagina
+
+
+def _pagina_foto(doc, rng):
+    # Imagen a página completa con un degradé de color y ruido
+    pagina = doc.new_page()
+    ancho, alto = 400, 566
+    xs = np.linspace(0, 255, ancho, dtype=np.float32)
+    ys = np.linspace(0, 255, alto, dtype=np.float32)[:, None]
+    img = np.empty((alto, ancho, 3), dtype=np.uint8)
+    img[..., 0] = xs
+    img[..., 1] = ys
+    img[..., 2] = 255 - (xs + ys) / 2
+    ruido = rng.integers(-20, 20, img.shape)
+    img = np.clip(img.astype(np.int16) + ruido, 0, 255).astype(np.uint8)
+    pix = fitz.Pixmap(fitz.csRGB, ancho, alto, img.tobytes(), False)
+    pagina.insert_image(pagina.rect, pixmap=pix)
+    return pagina
+
+
+def _pagina_escaneada(doc, rng):
+    # Página de texto "escaneada": una sola imagen JPEG a página completa, con el tono del papel,
+    # ruido de escáner y, a veces, un sello de color
+    with fitz.open() as temporal:
+        original = _pagina_texto(temporal, rng)
+        pix = original.get_pixmap(matrix=fitz.Matrix(150 / 72, 150 / 72), colorspace=fitz.csRGB, alpha=False)
+    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3).astype(np.float32)
+    img *= np.array([0.98, 0.97, 0.93], dtype=np.float32)  # Papel levemente amarillento
+    img += rng.normal(0, 6, img.shape[:2])[..., None]
+    if rng.random() < 0.3:
+        alto, ancho = img.shape[0] // 8, img.shape[1] // 4
+        y0, x0 = rng.integers(0, img.shape[0] - alto), rng.integers(0, img.shape[1] - ancho)
+        img[y0:y0 + alto, x0:x0 + ancho] = (40, 60, 200)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+    escaneo = fitz.Pixmap(fitz.csRGB, pix.width, pix.height, img.tobytes(), False)
+
+    pagina = doc.new_page()
+    pagina.insert_image(pagina.rect, stream=escaneo.tobytes("jpg", jpg_quality=75))
+    return pagina
+
+
+TIPOS_PAGINA = {
+    "texto": _pagina_texto,
+    "color": _pagina_color,
+    "foto": _pagina_foto,
+    "escaneada": _pagina_escaneada,
+}
+
+
+# Genera un PDF con una página por tipo. Con repeticiones > 1 el bloque de páginas se copia
+# varias veces, así los documentos largos no tardan en generarse lo que tardaría página a página.
+def generar_pdf(ruta, tipos, semilla=SEMILLA, repeticiones=1):
+    rng = np.random.default_rng(semilla)
+    doc = fitz.open()
+    for tipo in tipos:
+        TIPOS_PAGINA[tipo](doc, rng)
+    if repeticiones > 1:
+        bloque = fitz.open("pdf", doc.tobytes())
+        for _ in range(repeticiones - 1):
+            doc.insert_pdf(bloque)
+        bloque.close()
+    doc.save(ruta, garbage=3, deflate=True)
+    doc.close()
+    return ruta
+
+
+# Corpus mínimo: un documento por tipo de página y uno mixto
+def generar_corpus(carpeta=CARPETA_CORPUS):
+    os.makedirs(carpeta, exist_ok=True)
+    documentos = {
+        "texto.pdf": ["texto"] * 20,
+        "color.pdf": ["color"] * 20,
+        "foto.pdf": ["foto"] * 10,
+        "mixto.pdf": ["texto", "color", "texto", "foto", "texto"] * 4,
+    }
+    rutas = []
+    for i, (nombre, tipos) in enumerate(documentos.items()):
+        rutas.append(generar_pdf(os.path.join(carpeta, nombre), tipos, SEMILLA + i))
+    return rutas
+
+
+# Corpus de la suite (benchmarks/suite.py): nombre -> (tipos de página, repeticiones).
+# Cubre documentos de 1 a 2000 páginas; los largos son mayormente texto, como un apunte.
+DOCUMENTOS_SUITE = {
+    "texto_1.pdf": (["texto"], 1),
+    "texto_200.pdf": (["texto"] * 20, 10),
+    "color_100.pdf": (["color"] * 20, 5),
+    "fotos_50.pdf": (["foto"] * 10, 5),
+    "escaneado_50.pdf": (["escaneada"] * 10, 5),
+    "mixto_2000.pdf": (["texto", "texto", "color", "texto", "escaneada"] * 4, 100),
+}
+
+
+# Se regenera sólo lo que falta: el contenido depende únicamente de la semilla
+def generar_corpus_suite(carpeta=os.path.join(CARPETA_CORPUS, "suite")):
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for i, (nombre, (tipos, repeticiones)) in enumerate(DOCUMENTOS_SUITE.items()):
+        ruta = os.path.join(carpeta, nombre)
+        if not os.path.exists(ruta):
+            generar_pdf(ruta, tipos, SEMILLA + 100 + i, repeticiones)
+        rutas.append(ruta)
+    return rutas
+
+
+if __name__ == "__main__":
+    for ruta in generar_corpus() + generar_corpus_suite():
+        print(ruta)
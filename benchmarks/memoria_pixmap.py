@@ -0,0 +1,64 @@
+# Micro-benchmark: bytes asignados y tiempo por página al pasar del pixmap a NumPy
+#
+# Uso: python benchmarks/memoria_pixmap.py [DPI]
+# Compara el camino anterior (pix.samples -> PIL -> np.array -> HSV) con la vista
+# directa sobre pix.samples_mv. tracemalloc ve las asignaciones de Python y de NumPy
+# (incluidas las salidas de cv2) pero no el buffer interno de PIL, así que los bytes
+# del camino anterior son una cota inferior.
+import sys
+import time
+import tracemalloc
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+from corpus import generar_corpus
+
+import lector
+
+
+def camino_anterior(pix):
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    img_np = np.array(img)
+    return cv2.cvtColor(img_np, cv2.COLOR_RGB2HSV)
+
+
+def camino_vista(pix):
+    img_np, pix = lector.pixmap_a_rgb(pix)
+    return cv2.cvtColor(img_np, cv2.COLOR_RGB2HSV)
+
+
+def medir(paginas, dpi, camino):
+    zoom = dpi / 72
+    bytes_pico = 0
+    tiempo = 0.0
+    for pagina in paginas:
+        pix = pagina.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        hsv = camino(pix)
+        tiempo += time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        bytes_pico += pico
+        del hsv, pix
+    return bytes_pico / len(paginas), tiempo / len(paginas)
+
+
+def main(dpi):
+    documentos = [fitz.open(ruta) for ruta in generar_corpus()]
+    paginas = [pagina for doc in documentos for pagina in doc]
+
+    print(f"{len(paginas)} páginas a {dpi} DPI")
+    for nombre, camino in (("anterior (PIL)", camino_anterior), ("vista samples_mv", camino_vista)):
+        bytes_pagina, seg_pagina = medir(paginas, dpi, camino)
+        print(f"{nombre:<18} {bytes_pagina / 1024:>10.1f} KiB/página {seg_pagina * 1000:>8.3f} ms/página")
+
+    for doc in documentos:
+        doc.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else lector.dpi_color)
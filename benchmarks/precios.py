@@ -0,0 +1,90 @@
+# Latencia de cargar y guardar la tabla de precios: Excel (como antes) contra precios.json
+#
+# Uso: python benchmarks/precios.py [REPETICIONES]
+# La carga incluye el import de la biblioteca que hace falta, medido en un proceso nuevo
+# porque es lo que paga el arranque del programa.
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CARGAS = {
+    "pandas.read_excel (anterior)": (
+        "import pandas as pd\n"
+        "pd.read_excel('precios.xlsx', sheet_name=None)\n"
+    ),
+    "openpyxl sólo lectura": (
+        "from openpyxl import load_workbook\n"
+        "libro = load_workbook('precios.xlsx', read_only=True, data_only=True)\n"
+        "[list(libro[hoja].iter_rows(values_only=True)) for hoja in ('publico', 'estudiante')]\n"
+    ),
+    "precios.json": (
+        "import json\n"
+        "json.load(open('precios.json', encoding='utf-8'))\n"
+    ),
+}
+
+GUARDADOS = {
+    "pandas.ExcelWriter (anterior)": (
+        "import pandas as pd\n"
+        "publico, estudiante, color = l.cargar_precios()\n"
+        "def guardar():\n"
+        "    with pd.ExcelWriter('salida.xlsx') as writer:\n"
+        "        pd.DataFrame(publico).T.reset_index().to_excel(writer, sheet_name='publico', index=False)\n"
+        "        pd.DataFrame(estudiante).T.reset_index().to_excel(writer, sheet_name='estudiante', index=False)\n"
+    ),
+    "precios.json atómico": (
+        "publico, estudiante, color = l.cargar_precios()\n"
+        "def guardar():\n"
+        "    l.escribir_precios(publico, estudiante, color)\n"
+    ),
+}
+
+
+def correr(codigo, carpeta):
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "-c", codigo], cwd=carpeta, check=True)
+    return time.perf_counter() - inicio
+
+
+def main(repeticiones):
+    with tempfile.TemporaryDirectory() as carpeta:
+        shutil.copy(os.path.join(RAIZ_REPO, "precios.xlsx"), carpeta)
+        # Copia de lector.py con otro nombre para poder importarla desde la carpeta temporal
+        shutil.copy(os.path.join(RAIZ_REPO, "lector.py"), os.path.join(carpeta, "lector_precios.py"))
+        subprocess.run([sys.executable, "-c", "import lector_precios"], cwd=carpeta, check=True)  # crea precios.json
+
+        vacio = statistics.median(correr("pass", carpeta) for _ in range(repeticiones))
+        print(f"Carga en un proceso nuevo (descontando {vacio * 1000:.0f} ms de arranque de Python):")
+        for nombre, codigo in CARGAS.items():
+            try:
+                tiempo = statistics.median(correr(codigo, carpeta) for _ in range(repeticiones))
+                print(f"  {nombre:<32} {(tiempo - vacio) * 1000:>8.1f} ms")
+            except subprocess.CalledProcessError:
+                print(f"  {nombre:<32} no disponible")
+
+        print("Guardado (proceso ya iniciado):")
+        for nombre, preparacion in GUARDADOS.items():
+            codigo = (
+                "import time, statistics\n"
+                "import lector_precios as l\n"
+                + preparacion +
+                f"tiempos = []\n"
+                f"for _ in range({repeticiones}):\n"
+                "    inicio = time.perf_counter(); guardar(); tiempos.append(time.perf_counter() - inicio)\n"
+                "print(statistics.median(tiempos))\n"
+            )
+            try:
+                salida = subprocess.run([sys.executable, "-c", codigo], cwd=carpeta, check=True, capture_output=True, text=True)
+                print(f"  {nombre:<32} {float(salida.stdout) * 1000:>8.1f} ms")
+            except subprocess.CalledProcessError:
+                print(f"  {nombre:<32} no disponible")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,102 @@
+# Prueba de resistencia: cotiza miles de PDFs seguidos en un mismo proceso, como un día entero
+# de mostrador, y verifica que la memoria residente no crezca
+#
+# Uso: python benchmarks/soak.py [--cotizaciones N] [--procesos N] [--techo MB] [--tolerancia MB]
+# Corre en una carpeta temporal (precios por defecto) sobre un lote de PDFs variados: la mayoría
+# chicos, que se analizan en el proceso principal, y uno de cada LARGO_CADA con suficientes
+# páginas para que el análisis use el pool. Cada PDF se "vuelve a guardar" (cambia su fecha)
+# antes de cotizarlo, como los archivos que llegan una y otra vez, y se alterna entre blanco y
+# negro y color. Las cotizaciones a color no usan la caché de color: como la caché va por el
+# contenido, cambiar la fecha no alcanza y desde la segunda vuelta nada se volvería a analizar.
+# La memoria se mide sumando el proceso principal y los del pool; después del calentamiento no
+# puede crecer más de la tolerancia. Termina con código 1 si crece.
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from corpus import TIPOS_PAGINA, SEMILLA, generar_pdf
+
+LOTE = 40  # PDFs distintos del lote
+LARGO_CADA = 4  # Uno de cada tantos PDFs del lote es largo
+REPETICIONES_LARGO = 8  # Un PDF largo repite sus páginas: 4 * 8 = 32, suficiente para el pool
+PROCESOS = 4
+CALENTAMIENTO = 0.1  # Fracción de las cotizaciones que se descarta antes de tomar la referencia
+MEDICIONES = 20
+TOLERANCIA_MB = 20
+
+
+def generar_lote(carpeta):
+    tipos = list(TIPOS_PAGINA)
+    rutas = []
+    for i in range(LOTE):
+        paginas = [tipos[(i + k) % len(tipos)] for k in range(1 + i % 4)]
+        repeticiones = REPETICIONES_LARGO if i % LARGO_CADA == LARGO_CADA - 1 else 1
+        rutas.append(generar_pdf(os.path.join(carpeta, f"lote_{i:03d}.pdf"), paginas, SEMILLA + 500 + i, repeticiones))
+    return rutas
+
+
+def memoria_total_mb(lector):
+    total = lector.memoria_residente_mb() or 0.0
+    if lector._pool is not None:
+        for proceso in list(lector._pool._processes.values()):
+            total += lector.memoria_residente_mb(proceso.pid) or 0.0
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de resistencia de memoria del cotizador")
+    parser.add_argument("--cotizaciones", type=int, default=2000)
+    parser.add_argument("--procesos", type=int, default=PROCESOS, help="procesos del pool (al menos 2)")
+    parser.add_argument("--techo", type=int, metavar="MB", help="memoria_max_mb del análisis (0 = sin techo; por defecto, el del programa)")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_MB, metavar="MB")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        os.chdir(carpeta)
+        import lector
+
+        if args.techo is not None:
+            lector.memoria_max_mb = args.techo
+        procesos = max(2, args.procesos)
+        rutas = generar_lote(carpeta)
+        if lector.memoria_residente_mb() is None:
+            print("No se puede medir la memoria residente en esta plataforma ")
+            return 1
+
+        cada = max(1, args.cotizaciones // MEDICIONES)
+        desde = int(args.cotizaciones * CALENTAMIENTO)
+        referencia = None
+        maxima = 0.0
+        inicio = time.perf_counter()
+        print(f"{'cotizaciones':>12} {'RSS MB':>10}")
+        for i in range(args.cotizaciones):
+            ruta = rutas[i % len(rutas)]
+            os.utime(ruta, ns=(time.time_ns(), time.time_ns()))
+            color = i % 2 == 1
+            analisis_archivos, _ = lector.analizar_pdfs([ruta], procesos=procesos, usar_cache=not color, solo_paginas=not color)
+            lector.cotizar(list(analisis_archivos.values()), color=color)
+            del analisis_archivos
+
+            if (i + 1) % cada == 0:
+                memoria = memoria_total_mb(lector)
+                print(f"{i + 1:>12} {memoria:>10.1f}")
+                if i + 1 >= desde:
+                    if referencia is None:
+                        referencia = memoria
+                    maxima = max(maxima, memoria)
+        segundos = time.perf_counter() - inicio
+
+        if lector._pool is not None:
+            lector._pool.shutdown(wait=True)
+        os.chdir(os.path.dirname(carpeta))
+
+    crecimiento = maxima - referencia
+    print(f"{args.cotizaciones} cotizaciones en {segundos:.1f} s; después del calentamiento la memoria "
+          f"pasó de {referencia:.1f} MB a un máximo de {maxima:.1f} MB ({crecimiento:+.1f} MB, tolerancia {args.tolerancia} MB)")
+    return 1 if crecimiento > args.tolerancia else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
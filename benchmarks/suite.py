@@ -0,0 +1,241 @@
+# Suite de mediciones del cotizador sobre un corpus sintético, con un JSON de referencia
+#
+# Uso: python benchmarks/suite.py [--salida ARCHIVO] [--comparar REFERENCIA] [--repeticiones N]
+# Mide el análisis por página de cada documento del corpus (benchmarks/corpus.py), la cotización
+# completa (análisis + precios, sin caché y con la caché llena), la cotización en blanco y negro
+# (sólo cuenta páginas) y las consultas a la tabla de precios. Cada caso corre en un proceso nuevo, dentro de una carpeta temporal vacía: así el pico
+# de memoria (RSS) es sólo suyo y se usan los precios por defecto y una caché nueva, no los del
+# local. El JSON guarda páginas (u operaciones) por segundo, pico de RSS y los resultados de cada
+# caso; versionado junto al código, una regresión de velocidad o de resultado aparece como diff.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import RAIZ_REPO, DOCUMENTOS_SUITE, generar_corpus_suite
+
+SALIDA_POR_DEFECTO = os.path.join(RAIZ_REPO, "benchmarks", "referencia.json")
+TOLERANCIA = 0.10  # Caída de rendimiento aceptada al comparar contra la referencia
+
+
+# Pico de memoria residente del proceso y sus hijos (los procesos del pool), en MB
+def pico_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows: sólo el proceso propio
+        import lector
+
+        memoria = lector.memoria_windows_mb()
+        return round(memoria[1], 1) if memoria else None
+    propio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    escala = 1 if sys.platform == "darwin" else 1024  # macOS informa bytes; Linux, KiB
+    return round(max(propio, hijos) * escala / 2**20, 1)
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), resultado
+
+
+# Cada caso devuelve (unidades procesadas, segundos, resultado para comparar)
+def caso_analisis(ruta, repeticiones):
+    import fitz  # PyMuPDF
+    import lector
+
+    with fitz.open(ruta) as doc:
+        indices = list(range(len(doc)))
+
+    # El mismo recorrido que hace cada proceso del pool (analizar_paginas), en este proceso
+    def analizar():
+        analizadas, _ = lector.analizar_paginas(0, ruta, indices, lector.dpi_color, lector.sensitivity)
+        conteo = {"vectorial": 0, "raster": 0}
+        for _, metodo, *_ in analizadas:
+            conteo[metodo] += 1
+        return {"suma_color": round(sum(porcentaje for porcentaje, *_ in analizadas), 4), "paginas_por_metodo": conteo}
+
+    segundos, resultado = medir(analizar, repeticiones)
+    return sum(resultado["paginas_por_metodo"].values()), segundos, resultado
+
+
+def caso_cotizacion(rutas, repeticiones, con_cache):
+    import lector
+
+    def cotizar():
+        analisis_archivos, conteo_metodos = lector.analizar_pdfs(rutas, usar_cache=con_cache)
+        analisis_archivos = list(analisis_archivos.values())
+        totales = {
+            "bn": lector.cotizar(analisis_archivos)[0],
+            "bn_doble_faz_estudiante": lector.cotizar(analisis_archivos, doble_faz=True, usuario="estudiante")[0],
+            "color_anillado": lector.cotizar(analisis_archivos, color=True, anillado=True)[0],
+        }
+        return {"totales": totales, "paginas": sum(analisis.num_paginas for analisis in analisis_archivos)}
+
+    if con_cache:
+        cotizar()  # Llenar la caché; se mide la segunda pasada
+    segundos, resultado = medir(cotizar, repeticiones)
+    if lector._pool is not None:
+        lector._pool.shutdown(wait=True)  # Para que el RSS de los procesos cuente como hijos
+    return resultado["paginas"], segundos, resultado
+
+
+# Cotización en blanco y negro: sólo cuenta páginas, sin análisis de color. Los totales tienen
+# que coincidir con los "bn" de cotizacion/sin_cache.
+def caso_blanco_y_negro(rutas, repeticiones):
+    import lector
+
+    def cotizar():
+        analisis_archivos, _ = lector.analizar_pdfs(rutas, usar_cache=False, solo_paginas=True)
+        analisis_archivos = list(analisis_archivos.values())
+        totales = {
+            "bn": lector.cotizar(analisis_archivos)[0],
+            "bn_doble_faz_estudiante": lector.cotizar(analisis_archivos, doble_faz=True, usuario="estudiante")[0],
+        }
+        return {"totales": totales, "paginas": sum(analisis.num_paginas for analisis in analisis_archivos)}
+
+    segundos, resultado = medir(cotizar, repeticiones)
+    return resultado["paginas"], segundos, resultado
+
+
+def caso_precios(repeticiones):
+    import numpy as np
+    import lector
+
+    rng = np.random.default_rng(1234)
+    cantidades = rng.integers(1, 5000, 100_000).tolist()
+    fracciones = rng.random(1_000_000)
+
+    def consultar():
+        tabla = lector.tabla_precios
+        suma = 0
+        for cantidad in cantidades:
+            suma += tabla.precio_base(cantidad, "simple", "publico") or 0
+        bandas, recargos = tabla.bandas_color(fracciones)
+        return {"suma_precios": int(suma), "suma_recargos": int(recargos.sum())}
+
+    segundos, resultado = medir(consultar, repeticiones)
+    return len(cantidades) + len(fracciones), segundos, resultado
+
+
+def correr_caso(nombre, repeticiones):
+    rutas = generar_corpus_suite()
+    tipo, _, argumento = nombre.partition("/")
+    if tipo == "analisis":
+        unidades, segundos, resultado = caso_analisis(next(r for r in rutas if os.path.basename(r) == argumento), repeticiones)
+    elif nombre == "cotizacion/blanco_y_negro":
+        unidades, segundos, resultado = caso_blanco_y_negro(rutas, repeticiones)
+    elif tipo == "cotizacion":
+        unidades, segundos, resultado = caso_cotizacion(rutas, repeticiones, con_cache=argumento == "con_cache")
+    else:
+        unidades, segundos, resultado = caso_precios(repeticiones)
+    return {
+        "unidades": unidades,
+        "segundos": round(segundos, 4),
+        "por_segundo": round(unidades / segundos, 1) if segundos > 0 else None,
+        "pico_rss_mb": pico_rss_mb(),
+        "resultado": resultado,
+    }
+
+
+def nombres_casos():
+    return [f"analisis/{nombre}" for nombre in DOCUMENTOS_SUITE] + [
+        "cotizacion/sin_cache",
+        "cotizacion/con_cache",
+        "cotizacion/blanco_y_negro",
+        "precios",
+    ]
+
+
+def entorno():
+    import fitz  # PyMuPDF
+    import numpy as np
+
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "procesadores": os.cpu_count(),
+        "pymupdf": fitz.VersionBind,
+        "numpy": np.__version__,
+    }
+
+
+# Compara contra una referencia: informa el cambio de velocidad de cada caso y si cambió algún
+# resultado. Devuelve True si hay regresiones.
+def comparar(actual, referencia, tolerancia):
+    regresion = False
+    print(f"{'caso':<28} {'referencia/s':>14} {'actual/s':>14} {'cambio':>8}  RSS MB")
+    for nombre, caso in actual["casos"].items():
+        anterior = referencia.get("casos", {}).get(nombre)
+        if anterior is None or not anterior.get("por_segundo") or not caso["por_segundo"]:
+            print(f"{nombre:<28} {'-':>14} {caso['por_segundo'] or 0:>14.1f}")
+            continue
+        cambio = caso["por_segundo"] / anterior["por_segundo"] - 1
+        marca = ""
+        if cambio < -tolerancia:
+            marca, regresion = "  MÁS LENTO", True
+        if caso["resultado"] != anterior["resultado"]:
+            marca, regresion = marca + "  RESULTADO DISTINTO", True
+        print(f"{nombre:<28} {anterior['por_segundo']:>14.1f} {caso['por_segundo']:>14.1f} {cambio:>+8.1%}  "
+              f"{anterior['pico_rss_mb']} -> {caso['pico_rss_mb']}{marca}")
+    return regresion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de mediciones del cotizador")
+    parser.add_argument("--salida", default=SALIDA_POR_DEFECTO, help="JSON donde guardar los resultados")
+    parser.add_argument("--comparar", metavar="REFERENCIA", help="JSON de referencia contra el que comparar")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    parser.add_argument("--caso", help=argparse.SUPPRESS)  # Uso interno: correr un solo caso
+    parser.add_argument("--resultado", help=argparse.SUPPRESS)  # Uso interno: JSON donde el caso deja su resultado
+    args = parser.parse_args()
+
+    # El resultado va a un archivo y no a stdout, donde PyMuPDF y otras bibliotecas pueden
+    # escribir avisos
+    if args.caso:
+        resultado = correr_caso(args.caso, args.repeticiones)
+        with open(args.resultado, "w", encoding="utf-8") as f:
+            json.dump(resultado, f)
+        return 0
+
+    generar_corpus_suite()
+    resultados = {"entorno": entorno(), "casos": {}}
+    for nombre in nombres_casos():
+        with tempfile.TemporaryDirectory() as carpeta:
+            archivo_resultado = os.path.join(carpeta, "resultado.json")
+            proceso = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--caso", nombre, "--repeticiones", str(args.repeticiones),
+                 "--resultado", archivo_resultado],
+                cwd=carpeta, capture_output=True, text=True,
+            )
+            if proceso.returncode != 0:
+                print(f"{nombre}: falló\n{proceso.stderr}", file=sys.stderr)
+                return 1
+            with open(archivo_resultado, encoding="utf-8") as f:
+                caso = json.load(f)
+        resultados["casos"][nombre] = caso
+        print(f"{nombre:<28} {caso['por_segundo'] or 0:>12.1f}/s  {caso['segundos']:>8.3f} s  {caso['pico_rss_mb']} MB")
+
+    regresion = False
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresion = comparar(resultados, json.load(f), args.tolerancia)
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Resultados guardados en {args.salida}")
+    return 1 if regresion else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
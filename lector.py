@@ -1,36 +1,150 @@
-import fitz  # PyMuPDF
 import cv2
+import fitz  # PyMuPDF
 import numpy as np
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from tkinter import filedialog, messagebox, Toplevel, StringVar, IntVar
-from PIL import Image
-import pandas as pd
+from tkinter import filedialog, messagebox, Toplevel, IntVar, Text
 import os
-from tqdm import tqdm
-from docx2pdf import convert as convert_docx
 import tempfile
 import shutil
+import subprocess
+import math
+import multiprocessing
+import concurrent.futures
+import queue
+import threading
+import hashlib
+import sqlite3
+import time
+import functools
+import gc
+import bisect
+import sys
+import glob
+import csv
+import json
+import zlib
+import textwrap
+import argparse
+import re
 
 
 # Variables globales para los precios de fotocopia según la tabla
-PRECIOS_PATH = "precios.xlsx"
+PRECIOS_PATH = "precios.json"
+PRECIOS_EXCEL_PATH = "precios.xlsx"  # Sólo para importar la tabla la primera vez que se abre el programa
+PRECIOS_VERSION = 2  # Versión del formato de precios.json (la 1 no tenía bandas de color)
 sensitivity = 50  # Valor predeterminado para la sensibilidad
+dpi_color = 36  # Resolución (DPI) a la que se renderizan las páginas para detectar color (72 = resolución completa)
+num_procesos = os.cpu_count() or 1  # Procesos para el análisis de color (1 = sin paralelismo)
+
+# Caché en disco del porcentaje de color de cada página, junto al archivo de precios
+CACHE_PATH = os.path.join(os.path.dirname(PRECIOS_PATH), "cache_color.sqlite")
+CACHE_VERSION = 6  # Incrementar cuando cambie la forma de calcular el porcentaje de color o lo que se guarda
+cache_max_mb = 50  # Tamaño máximo de la caché; al superarlo se borran las páginas usadas hace más tiempo
+analisis_por_franjas = False  # Analizar de a franjas y cortar apenas se sabe la banda de color de la página
+FRANJAS = 8  # Franjas horizontales en que se parte la página en el análisis por franjas
+muestreo_desde = 0  # Estimar el color por muestreo en PDFs de al menos tantas páginas (0 = analizar todas)
+muestreo_paginas = 60  # Páginas de la muestra de cada PDF muestreado
+tolerancia_muestreo = 0.05  # Margen máximo del costo estimado por muestreo (a cada lado, relativo al costo)
+medir_etapas = False  # Tomar tiempos por etapa del análisis (se activa desde "Ajustes Avanzados")
+memoria_max_mb = 512  # Techo de memoria residente de cada proceso del análisis (0 = sin techo)
+HISTERESIS_TECHO_MB = 64  # Si liberar no alcanza para bajar del techo, cuánto más tiene que crecer antes de volver a liberar
+FILAS_POR_TANDA = 500  # Filas de la tabla de detalles que se insertan por vuelta del bucle de Tk
+
+
+# Guarda un JSON escribiendo primero un temporal y renombrándolo, para no dejar archivos a medias
+def escribir_json_atomico(ruta, datos):
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    descriptor, ruta_temporal = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        os.replace(ruta_temporal, ruta)
+    except BaseException:
+        os.remove(ruta_temporal)
+        raise
+
+
+# Lee una hoja de precios: la primera fila tiene "cantidad" y los límites de cada tramo, y cada
+# fila siguiente un tipo ("simple", "doble") con sus precios. Las celdas vacías valen 0.
+def leer_hoja_precios(hoja):
+    filas = hoja.iter_rows(values_only=True)
+    cantidades = next(filas)[1:]
+    precios = {}
+    for fila in filas:
+        if not fila or fila[0] is None:
+            continue
+        valores = fila[1:]
+        precios[fila[0]] = {
+            int(cantidad): int(valores[i]) if i < len(valores) and valores[i] not in (None, "") else 0
+            for i, cantidad in enumerate(cantidades) if cantidad is not None
+        }
+    return precios
+
+
+def importar_precios_excel(ruta):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        return leer_hoja_precios(libro['publico']), leer_hoja_precios(libro['estudiante'])
+    finally:
+        libro.close()
+
+
+# Misma disposición que lee importar_precios_excel: una hoja por tipo de usuario
+def exportar_precios_excel(ruta, precios_publico, precios_estudiante):
+    from openpyxl import Workbook
+
+    libro = Workbook()
+    libro.remove(libro.active)
+    for nombre, precios in (("publico", precios_publico), ("estudiante", precios_estudiante)):
+        hoja = libro.create_sheet(nombre)
+        cantidades = sorted({cantidad for tramos in precios.values() for cantidad in tramos})
+        hoja.append(["cantidad"] + cantidades)
+        for tipo, tramos in precios.items():
+            hoja.append([tipo] + [tramos.get(cantidad) for cantidad in cantidades])
+    libro.save(ruta)
+
+
+# Recargo por página a color según la fracción de la página que tiene color: cada página paga el
+# recargo de la banda más alta cuyo umbral alcanza. Claves: umbral (fracción 0..1); valores: recargo.
+PRECIOS_COLOR_POR_DEFECTO = {
+    0.0: 100,
+    0.05: 150,
+    0.25: 250,
+    0.5: 400,
+    0.75: 600,
+}
+
+
+# JSON guarda las claves como texto: se vuelven a convertir a enteros
+def precios_desde_json(precios):
+    return {tipo: {int(cantidad): int(precio) for cantidad, precio in tramos.items()} for tipo, tramos in precios.items()}
 
-# Cargar precios desde el archivo Excel si existe, de lo contrario usar precios por defecto
+
+# Cargar precios desde precios.json si existe. La primera vez se importa precios.xlsx (si está)
+# y se guarda como JSON; si no hay ninguno de los dos se usan los precios por defecto.
+# Devuelve (precios_publico, precios_estudiante, precios_color).
 def cargar_precios():
     if os.path.exists(PRECIOS_PATH):
-        df = pd.read_excel(PRECIOS_PATH, sheet_name=None)
-        precios_publico = df['publico'].set_index('cantidad').T.fillna(0).to_dict('dict')
-        precios_estudiante = df['estudiante'].set_index('cantidad').T.fillna(0).to_dict('dict')
-        
-        # Convertir los valores a enteros
-        for tipo in precios_publico:
-            precios_publico[tipo] = {int(key): int(value) for key, value in precios_publico[tipo].items()}
-        for tipo in precios_estudiante:
-            precios_estudiante[tipo] = {int(key): int(value) for key, value in precios_estudiante[tipo].items()}
-            
-        return precios_publico, precios_estudiante
+        with open(PRECIOS_PATH, encoding="utf-8") as f:
+            datos = json.load(f)
+        if datos.get("version") not in (1, PRECIOS_VERSION):
+            raise ValueError(f"{PRECIOS_PATH} tiene una versión de formato desconocida: {datos.get('version')}")
+        if "color" in datos:
+            precios_color = {float(umbral): int(recargo) for umbral, recargo in datos["color"].items()}
+        else:
+            precios_color = dict(PRECIOS_COLOR_POR_DEFECTO)
+        return precios_desde_json(datos["publico"]), precios_desde_json(datos["estudiante"]), precios_color
+    elif os.path.exists(PRECIOS_EXCEL_PATH):
+        precios_publico, precios_estudiante = importar_precios_excel(PRECIOS_EXCEL_PATH)
+        precios_color = dict(PRECIOS_COLOR_POR_DEFECTO)
+        try:
+            escribir_precios(precios_publico, precios_estudiante, precios_color)
+        except OSError as e:
+            print(f"No se pudo crear {PRECIOS_PATH}: {e}")
+        return precios_publico, precios_estudiante, precios_color
     else:
         precios_publico = {
             "simple": {
@@ -60,7 +174,7 @@ def cargar_precios():
                 100: 80
             }
         }
-        return precios_publico, precios_estudiante
+        return precios_publico, precios_estudiante, dict(PRECIOS_COLOR_POR_DEFECTO)
 
 precios_anillado = {
     "hasta_100": {
@@ -82,184 +196,1881 @@ precios_anillado = {
 
 
 
-def guardar_precios(precios_publico, precios_estudiante):
-    df_publico = pd.DataFrame(precios_publico).T.reset_index().rename(columns={'index': 'cantidad'})
-    df_estudiante = pd.DataFrame(precios_estudiante).T.reset_index().rename(columns={'index': 'cantidad'})
+def escribir_precios(precios_publico, precios_estudiante, precios_color):
+    escribir_json_atomico(PRECIOS_PATH, {
+        "version": PRECIOS_VERSION,
+        "publico": precios_publico,
+        "estudiante": precios_estudiante,
+        "color": precios_color,
+    })
+
+
+def guardar_precios(precios_publico, precios_estudiante, precios_color):
     try:
-        with pd.ExcelWriter(PRECIOS_PATH) as writer:
-            df_publico.to_excel(writer, sheet_name='publico', index=False)
-            df_estudiante.to_excel(writer, sheet_name='estudiante', index=False)
-        messagebox.showinfo("Éxito", "Precios actualizados con éxito")
+        escribir_precios(precios_publico, precios_estudiante, precios_color)
+        return True
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudieron guardar los precios: {e}\nRuta: {PRECIOS_PATH}\nVerifica los permisos y asegúrate de que el archivo no esté en uso.")
+        messagebox.showerror("Error", f"No se pudieron guardar los precios: {e}\nRuta: {PRECIOS_PATH}\nVerifica los permisos de la carpeta.")
         print(f"Error: {e}")
         print(f"Ruta del archivo: {os.path.abspath(PRECIOS_PATH)}")
+        return False
+
+
+# Tabla de precios "compilada": para cada usuario y tipo, los límites de cantidad ordenados y sus
+# precios, listos para buscar con bisect, y las bandas de color en arreglos para clasificar todas
+# las páginas de un trabajo de una vez.
+# No se modifica nunca: al editar los precios se arma una tabla nueva y se reemplaza entera.
+class TablaPrecios:
+    def __init__(self, precios_publico, precios_estudiante, precios_color):
+        # Listas de Python: bisect sobre listas es más rápido que sobre arreglos
+        self._limites_lista = {}
+        self._precios_lista = {}
+        for usuario, precios in (("publico", precios_publico), ("estudiante", precios_estudiante)):
+            for tipo, tramos in precios.items():
+                ordenados = sorted(tramos.items())
+                self._limites_lista[usuario, tipo] = [limite for limite, _ in ordenados]
+                self._precios_lista[usuario, tipo] = [precio for _, precio in ordenados]
+
+        bandas = sorted(precios_color.items())
+        self.umbrales_color = np.array([umbral for umbral, _ in bandas], dtype=np.float64)
+        self.recargos_color = np.array([recargo for _, recargo in bandas], dtype=np.int64)
+
+    # Precio por copia del tramo que corresponde a la cantidad, o None si no llega al primer tramo
+    def precio_base(self, cantidad, tipo, usuario):
+        clave = ("estudiante" if usuario == "estudiante" else "publico", tipo)
+        i = bisect.bisect_right(self._limites_lista[clave], cantidad) - 1
+        return self._precios_lista[clave][i] if i >= 0 else None
+
+    # Banda de color (índice en umbrales_color, -1 si no alcanza ninguna) y recargo de cada página
+    def bandas_color(self, fracciones):
+        fracciones = np.asarray(fracciones, dtype=np.float64)
+        if len(self.umbrales_color) == 0:
+            return np.full(fracciones.shape, -1), np.zeros(fracciones.shape, dtype=np.int64)
+        bandas = np.searchsorted(self.umbrales_color, fracciones, side="right") - 1
+        recargos = np.where(bandas >= 0, self.recargos_color[np.maximum(bandas, 0)], 0)
+        return bandas, recargos
+
+    # Texto de una banda para mostrar, por ejemplo "25-50%"
+    def nombre_banda(self, banda):
+        desde = self.umbrales_color[banda] * 100
+        if banda + 1 < len(self.umbrales_color):
+            return f"{desde:g}-{self.umbrales_color[banda + 1] * 100:g}%"
+        return f"{desde:g}% o más"
+
+
+def actualizar_tabla_precios(nuevos_publico, nuevos_estudiante, nuevos_color=None):
+    # Se arma la tabla nueva antes de tocar los globales, así nunca queda una mezcla de las dos
+    global precios_publico, precios_estudiante, precios_color, tabla_precios
+    if nuevos_color is None:
+        nuevos_color = precios_color
+    nueva_tabla = TablaPrecios(nuevos_publico, nuevos_estudiante, nuevos_color)
+    precios_publico, precios_estudiante, precios_color, tabla_precios = nuevos_publico, nuevos_estudiante, nuevos_color, nueva_tabla
+
+
+precios_publico, precios_estudiante, precios_color = cargar_precios()
+tabla_precios = TablaPrecios(precios_publico, precios_estudiante, precios_color)
+
+# Precio por copia en blanco y negro según el tramo de cantidad. El color se cotiza por página
+# con las bandas de la tabla (ver calcular_costos).
+def obtener_precio(cantidad, tipo, usuario):
+    precio = tabla_precios.precio_base(cantidad, tipo, usuario)
+    if precio is None:
+        return 0
+    return int(precio)
+
+
+
+# Tiempos por etapa del análisis: {etapa: (segundos, veces)}. marcar(etapa) suma a la etapa el
+# tiempo desde la marca anterior (o desde reiniciar()). Cuando no se mide se pasa None en lugar
+# de un cronómetro, así el análisis normal no paga nada.
+class Cronometro:
+    # Orden en que se muestran las etapas
+    ETAPAS = ("abrir", "cache", "cargar", "vectorial", "render", "conversion", "umbral", "interfaz", "precios")
+
+    def __init__(self, etapas=None):
+        self.etapas = dict(etapas or {})
+        self._ultimo = time.perf_counter()
+
+    def reiniciar(self):
+        self._ultimo = time.perf_counter()
+
+    def marcar(self, etapa):
+        ahora = time.perf_counter()
+        segundos, veces = self.etapas.get(etapa, (0.0, 0))
+        self.etapas[etapa] = (segundos + ahora - self._ultimo, veces + 1)
+        self._ultimo = ahora
+
+    # Suma los tiempos de otro cronómetro (por ejemplo, los que devuelve un proceso del pool)
+    def sumar(self, etapas):
+        for etapa, (segundos, veces) in etapas.items():
+            segundos_antes, veces_antes = self.etapas.get(etapa, (0.0, 0))
+            self.etapas[etapa] = (segundos_antes + segundos, veces_antes + veces)
+
+    def ordenadas(self):
+        orden = {etapa: i for i, etapa in enumerate(self.ETAPAS)}
+        return sorted(self.etapas.items(), key=lambda item: orden.get(item[0], len(orden)))
+
+    def texto(self):
+        return ", ".join(f"{etapa} {segundos * 1000:.1f} ms ({veces})" for etapa, (segundos, veces) in self.ordenadas())
+
+
+def pixmap_a_array(pix):
+    # Vista de NumPy sobre el buffer del pixmap, sin copiarlo: cada fila ocupa pix.stride bytes
+    buffer = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    filas = buffer.reshape(pix.height, pix.stride)[:, :pix.width * pix.n]
+    return filas.reshape(pix.height, pix.width, pix.n)
+
+
+def pixmap_a_rgb(pix):
+    # Grises, CMYK y otros espacios de color se convierten a RGB (ésta sí es una copia)
+    if pix.colorspace is None or pix.colorspace.n != 3:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+
+    # Si hay canal alfa se descarta tomando sólo los tres primeros canales de la vista.
+    # Devolvemos también el pixmap porque la vista no mantiene vivo su buffer.
+    return pixmap_a_array(pix)[:, :, :3], pix
+
+
+# Para cada valor V = max(R,G,B), el croma (max - min) mínimo para que la saturación llegue a la
+# sensibilidad. La saturación se redondea como en OpenCV, S = round(255 * croma / V), así que
+# S >= sensibilidad equivale a 510 * croma >= (2 * sensibilidad - 1) * V, todo en enteros.
+# Los valores con V < sensibilidad quedan en 255, que su croma (a lo sumo V) no alcanza.
+# Es una tabla de 8 bits para usarla con cv2.LUT.
+@functools.lru_cache(maxsize=16)
+def tabla_croma_minimo(sensibilidad):
+    v = np.arange(256, dtype=np.int32)
+    minimo = np.maximum(-((-(2 * sensibilidad - 1) * v) // 510), 0)
+    minimo[v < sensibilidad] = 255
+    return minimo.astype(np.uint8)
+
+
+# V = max(R,G,B) y croma = max - min de cada píxel, como planos de 8 bits. Las operaciones de
+# OpenCV entre planos son unas 2,5 veces más rápidas que np.maximum/np.minimum sobre las vistas
+# de cada canal (que no son contiguas) y no crean temporales de más de 8 bits.
+def maximo_y_croma(img_rgb):
+    r, g, b = cv2.split(img_rgb)
+    maximo = cv2.max(cv2.max(r, g), b)
+    return maximo, cv2.subtract(maximo, cv2.min(cv2.min(r, g), b))
+
+
+# Las imágenes grandes se recorren de a bloques de filas de unos PIXELES_POR_BLOQUE píxeles,
+# así los planos intermedios de cada bloque quedan en la caché del procesador. A 36 DPI una
+# página entra en un solo bloque; a 150 DPI, de una vez, el conteo tarda más del doble.
+PIXELES_POR_BLOQUE = 1 << 17
+
+def bloques_de_filas(img):
+    filas = max(1, PIXELES_POR_BLOQUE // max(1, img.shape[1]))
+    for inicio in range(0, img.shape[0], filas):
+        yield img[inicio:inicio + filas]
+
+
+# Cuenta los píxeles con saturación y valor (HSV) mayores o iguales a la sensibilidad,
+# sin convertir la imagen a HSV: el croma mínimo de cada píxel sale de la tabla por su V
+def contar_pixeles_color(img_rgb, sensibilidad):
+    tabla = tabla_croma_minimo(sensibilidad)
+    pixeles_color = 0
+    for bloque in bloques_de_filas(img_rgb):
+        maximo, croma = maximo_y_croma(bloque)
+        pixeles_color += cv2.countNonZero(cv2.compare(croma, cv2.LUT(maximo, tabla), cv2.CMP_GE))
+    return pixeles_color
+
+
+# Para cada par (V, croma), el mayor umbral de sensibilidad con el que el píxel todavía cuenta
+# como color: min(S, V), con S = round(255 * croma / V) como en tabla_croma_minimo. Así un píxel
+# cuenta con la sensibilidad s si y sólo si su valor en la tabla es >= s.
+@functools.lru_cache(maxsize=1)
+def tabla_saturacion_valor():
+    v = np.arange(256, dtype=np.int32)[:, None]
+    croma = np.arange(256, dtype=np.int32)[None, :]
+    saturacion = (510 * croma + v) // np.maximum(2 * v, 1)
+    return np.minimum(np.where(v > 0, saturacion, 0), v).astype(np.uint8)
+
+
+# Para plegar un histograma de pares (V, croma) en uno de min(S, V): las posiciones de la tabla
+# aplanada ordenadas por su valor y dónde empieza cada valor. Los 256 valores aparecen (con
+# V = 255, min(S, V) es el croma), así que ningún tramo queda vacío.
+@functools.lru_cache(maxsize=1)
+def orden_saturacion_valor():
+    tabla = tabla_saturacion_valor().ravel()
+    orden = np.argsort(tabla, kind="stable")
+    return orden, np.searchsorted(tabla[orden], np.arange(256))
+
+
+# Histograma de 256 posiciones de min(S, V) de los píxeles de la imagen: los píxeles de color con
+# cualquier sensibilidad s son la suma de las posiciones s..255, sin volver a renderizar.
+# cv2.calcHist cuenta los pares (V, croma) en un histograma de 256 x 256 y después se pliega con
+# la tabla: indexar la tabla con cada píxel costaba cuatro veces más que contar los píxeles.
+def histograma_color(img_rgb):
+    pares = np.zeros(256 * 256, dtype=np.int64)
+    for bloque in bloques_de_filas(img_rgb):
+        maximo, croma = maximo_y_croma(bloque)
+        # calcHist cuenta en float32, exacto hasta 2**24 píxeles por par: se acumula en enteros
+        pares += cv2.calcHist([maximo, croma], [0, 1], None, [256, 256], [0, 256, 0, 256]).ravel().astype(np.int64)
+    orden, inicios = orden_saturacion_valor()
+    return np.add.reduceat(pares[orden], inicios).astype(np.uint32)
+
+
+# Histograma de una página que se probó gris sin renderizarla: todo en la posición 0, que sólo
+# cuenta como color con sensibilidad 0 (igual que al renderizarla)
+HISTOGRAMA_GRIS = np.zeros(256, dtype=np.uint32)
+HISTOGRAMA_GRIS[0] = 1
+
+
+# Fracción de color con la sensibilidad dada a partir de un histograma (o de varios, uno por fila)
+def fraccion_desde_histograma(histograma, sensibilidad):
+    histograma = np.asarray(histograma, dtype=np.float64)
+    total = histograma.sum(axis=-1)
+    return histograma[..., sensibilidad:].sum(axis=-1) / np.maximum(total, 1)
+
+
+# Renderiza la página a la resolución de análisis y devuelve su histograma (histograma_color)
+def obtener_histograma_color(pagina, dpi=None, cronometro=None):
+    if dpi is None:
+        dpi = dpi_color
+    if cronometro:
+        cronometro.reiniciar()
+
+    # 72 DPI es la escala 1:1 de PyMuPDF
+    zoom = dpi / 72
+    pix = pagina.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+    if cronometro:
+        cronometro.marcar("render")
+
+    # Envolver las muestras del pixmap como arreglo de NumPy sin pasar por PIL
+    img_np, pix = pixmap_a_rgb(pix)
+    if cronometro:
+        cronometro.marcar("conversion")
+
+    histograma = histograma_color(img_np)
+    if cronometro:
+        cronometro.marcar("umbral")
+    return histograma
+
+
+# Fracción de color de la página renderizándola de a FRANJAS franjas horizontales
+# (get_pixmap con clip) y cortando apenas la fracción de color de la página queda acotada dentro
+# de una sola banda de umbrales: para el precio no hace falta más. Después de analizar una parte
+# cubierto de la página con fracción x en lo analizado, la página está entre cubierto * x
+# (el resto sin color) y cubierto * x + (1 - cubierto) (el resto todo color).
+# Devuelve (estimacion, minimo, maximo); la estimación es x, que siempre cae entre las cotas.
+# Si se analizan todas las franjas, las tres coinciden.
+def obtener_porcentaje_color_franjas(pagina, umbrales, dpi=None, sensibilidad=None, cronometro=None):
+    if dpi is None:
+        dpi = dpi_color
+    if sensibilidad is None:
+        sensibilidad = sensitivity
+    if cronometro:
+        cronometro.reiniciar()
+
+    zoom = dpi / 72
+    matriz = fitz.Matrix(zoom, zoom)
+    rect = pagina.rect
+    alto_franja = rect.height / FRANJAS
+    # get_pixmap(clip=...) vuelve a interpretar la página entera en cada franja: la lista de
+    # visualización se arma una vez y cada franja sólo rasteriza su parte
+    lista = pagina.get_displaylist()
+    pixeles = pixeles_color = 0
+    estimacion = minimo = maximo = 0.0
+    for k in range(FRANJAS):
+        clip = fitz.Rect(rect.x0, rect.y0 + k * alto_franja, rect.x1, rect.y0 + (k + 1) * alto_franja)
+        pix = lista.get_pixmap(matrix=matriz, colorspace=fitz.csRGB, alpha=False, clip=clip)
+        if cronometro:
+            cronometro.marcar("render")
+        img_np, pix = pixmap_a_rgb(pix)
+        if cronometro:
+            cronometro.marcar("conversion")
+        pixeles_color += contar_pixeles_color(img_np, sensibilidad)
+        pixeles += pix.width * pix.height
+        del img_np, pix  # Sólo una franja en memoria a la vez
+        if cronometro:
+            cronometro.marcar("umbral")
+
+        cubierto = (k + 1) / FRANJAS
+        estimacion = pixeles_color / pixeles if pixeles else 0.0
+        minimo = cubierto * estimacion
+        maximo = minimo + (1 - cubierto)
+        if np.searchsorted(umbrales, minimo, side="right") == np.searchsorted(umbrales, maximo, side="right"):
+            break
+    del lista
+    if maximo - minimo < 1e-12:
+        minimo = maximo = estimacion
+    return estimacion, minimo, maximo
+
+
+# Un color de PyMuPDF (tupla de floats 0..1 en gris, RGB o CMYK) es gris si no tiene croma
+def es_color_gris(color):
+    if len(color) == 3:
+        return max(color) - min(color) <= 1 / 255
+    if len(color) == 4:
+        return max(color[:3]) <= 1 / 255
+    return len(color) <= 1
+
+
+# /Shading y /Pattern no aparecen en get_drawings ni en get_text, así que cualquier objeto que
+# los declare en sus recursos (propios o heredados del árbol de páginas) se trata como ambiguo
+def recursos_tienen_sombreados(doc, xref):
+    for _ in range(32):
+        tipo, valor = doc.xref_get_key(xref, "Resources")
+        if tipo == "xref":
+            valor = doc.xref_object(int(valor.split()[0]))
+        if tipo != "null":
+            return "/Shading" in valor or "/Pattern" in valor
+        tipo, valor = doc.xref_get_key(xref, "Parent")
+        if tipo != "xref":
+            return False
+        xref = int(valor.split()[0])
+    return True
+
+
+# True si la página tiene anotaciones, campos de formulario (se renderizan con sus propios
+# colores) o sombreados, que no se pueden revisar sin renderizar
+def tiene_contenido_opaco(pagina):
+    doc = pagina.parent
+    if pagina.first_annot is not None or pagina.first_widget is not None:
+        return True
+    if recursos_tienen_sombreados(doc, pagina.xref):
+        return True
+    return any(recursos_tienen_sombreados(doc, xobjeto[0]) for xobjeto in pagina.get_xobjects())
+
+
+# Operadores de un flujo de contenido que cambian el color o pintan algo que no se puede revisar
+# sin renderizar: colores de trazo y relleno (rg, k, sc, scn y sus mayúsculas), espacios de color
+# (cs/CS), imágenes en línea (BI, que get_images no lista) y sombreados (sh). g/G siempre son gris.
+# Un operador va separado por blancos o delimitadores; una coincidencia dentro de un texto sólo
+# puede hacer que la página se renderice de más, nunca de menos. El delimitador anterior se
+# revisa aparte: con un lookbehind la búsqueda tarda unas 4 veces más.
+OPERADOR_COLOR = re.compile(rb"(rg|RG|k|K|scn|SCN|sc|SC|cs|CS|BI|sh)(?![^\s\[\]()<>{}/%])")
+DELIMITADORES = frozenset(b" \t\r\n\f\0[]()<>{}")
+OPERANDOS_NUMERICOS = re.compile(rb"(?:[-+]?(?:\d+\.?\d*|\.\d+)\s+)+$")
+ESPACIO_COLOR_OPERANDO = re.compile(rb"/(DeviceGray|DeviceRGB|DeviceCMYK)\s+$")
+CANTIDAD_OPERANDOS = {b"rg": (3,), b"RG": (3,), b"k": (4,), b"K": (4,)}
+
+
+# True si los operadores de color de un flujo de contenido sólo ponen grises. Corta en el primer
+# color que no puede probar gris. Los espacios de color con nombre de recurso (ICC, Indexed,
+# Separation, Pattern) no se resuelven: sólo se aceptan los de dispositivo, así la cantidad de
+# operandos de sc/scn dice el espacio (1 gris, 3 RGB, 4 CMYK).
+def contenido_es_gris(contenido):
+    for operador in OPERADOR_COLOR.finditer(contenido):
+        inicio = operador.start()
+        if inicio and contenido[inicio - 1] not in DELIMITADORES:
+            continue  # Final de otra palabra (un nombre, otro operador)
+        nombre = operador.group(1)
+        anteriores = contenido[max(0, inicio - 64):inicio]
+        if nombre in (b"cs", b"CS"):
+            if not ESPACIO_COLOR_OPERANDO.search(anteriores):
+                return False
+            continue
+        if nombre in (b"BI", b"sh"):
+            return False
+        operandos = OPERANDOS_NUMERICOS.search(anteriores)
+        if operandos is None:  # scn con un patrón, o algo que no se entiende
+            return False
+        color = [float(valor) for valor in operandos.group().split()]
+        if len(color) not in CANTIDAD_OPERANDOS.get(nombre, (1, 3, 4)) or not es_color_gris(color):
+            return False
+    return True
+
+
+# Una imagen (entrada de get_images) es gris si su espacio de color es DeviceGray, CalGray o un
+# perfil ICC de un solo canal, que es como guardan los grises PyMuPDF y muchos escáneres
+def imagen_es_gris(doc, imagen):
+    if imagen[5] in ("DeviceGray", "CalGray"):
+        return True
+    if imagen[5] != "ICCBased":
+        return False
+    tipo, valor = doc.xref_get_key(imagen[0], "ColorSpace")
+    if tipo == "xref":
+        valor = doc.xref_object(int(valor.split()[0]))
+    perfil = re.search(r"/ICCBased\s+(\d+)\s+0\s+R", valor)
+    return perfil is not None and doc.xref_get_key(int(perfil.group(1)), "N") == ("int", "1")
+
+
+# Revisa los colores de los flujos de contenido de la página y de sus formularios (XObject) y
+# los espacios de color de sus imágenes, sin interpretar la página. Devuelve True sólo si puede
+# probar que la página es toda gris; ante la duda devuelve False.
+def pagina_es_monocromatica(pagina):
+    if tiene_contenido_opaco(pagina):
+        return False
+
+    # Imágenes: sólo se aceptan las que están en escala de grises. Las máscaras (sin espacio
+    # de color) se pintan con el color de relleno del contenido, que no conocemos.
+    doc = pagina.parent
+    if not all(imagen_es_gris(doc, imagen) for imagen in pagina.get_images(full=True)):
+        return False
+
+    # Cada glifo de una fuente Type3 es un pequeño flujo de contenido con sus propios colores
+    if any(fuente[2] == "Type3" for fuente in pagina.get_fonts(full=True)):
+        return False
+
+    # read_contents junta los flujos de la página en una sola llamada (un operador puede tener
+    # los operandos en el flujo anterior); los formularios se revisan aparte.
+    if not contenido_es_gris(pagina.read_contents()):
+        return False
+    return all(contenido_es_gris(doc.xref_stream(xobjeto[0]) or b"") for xobjeto in pagina.get_xobjects())
+
+
+# True si se probó que la página es gris sin renderizarla. Con sensibilidad 0 todo píxel
+# cuenta como color, así que ninguna página se puede dar por gris.
+def es_gris_sin_renderizar(pagina, sensibilidad, cronometro=None):
+    if sensibilidad <= 0:
+        return False
+    if cronometro:
+        cronometro.reiniciar()
+    monocromatica = pagina_es_monocromatica(pagina)
+    if cronometro:
+        cronometro.marcar("vectorial")
+    return monocromatica
+
+
+# Hash del contenido del archivo; se recuerda por ruta, fecha de modificación y tamaño para no releerlo.
+# Sólo los últimos HASHES_RECORDADOS: en una sesión larga cada versión de cada archivo suma una clave.
+_hashes_archivos = {}
+HASHES_RECORDADOS = 4096
+
+def hash_archivo(ruta_pdf):
+    estado = os.stat(ruta_pdf)
+    clave = (os.path.abspath(ruta_pdf), estado.st_mtime_ns, estado.st_size)
+    if clave not in _hashes_archivos:
+        sha = hashlib.sha256()
+        with open(ruta_pdf, "rb") as f:
+            for bloque in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(bloque)
+        _hashes_archivos[clave] = sha.hexdigest()
+        while len(_hashes_archivos) > HASHES_RECORDADOS:
+            del _hashes_archivos[next(iter(_hashes_archivos))]
+    return _hashes_archivos[clave]
+
+
+def abrir_cache():
+    conexion = sqlite3.connect(CACHE_PATH, timeout=10)
+    if conexion.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+        # Caché de otra versión del análisis: se descarta entera
+        conexion.execute("DROP TABLE IF EXISTS paginas")
+        conexion.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS paginas ("
+        " hash TEXT, pagina INTEGER, sensibilidad INTEGER, dpi INTEGER,"
+        " porcentaje REAL, ancho REAL, alto REAL, minimo REAL, maximo REAL, histograma BLOB, ultimo_uso REAL,"
+        " PRIMARY KEY (hash, pagina, sensibilidad, dpi))"
+    )
+    conexion.execute("CREATE INDEX IF NOT EXISTS paginas_ultimo_uso ON paginas (ultimo_uso)")
+    return conexion
+
+
+# Los histogramas se guardan comprimidos: casi todas sus posiciones están en cero
+def histograma_a_blob(histograma):
+    return None if histograma is None else zlib.compress(np.asarray(histograma, dtype="<u4").tobytes())
+
+
+def blob_a_histograma(blob):
+    return None if blob is None else np.frombuffer(zlib.decompress(blob), dtype="<u4").astype(np.uint32)
+
+
+# Devuelve {pagina: (porcentaje, ancho, alto, minimo, maximo, histograma)} con las páginas del
+# archivo que ya están en la caché. Una página guardada con otra sensibilidad también sirve si
+# tiene histograma: su porcentaje se recalcula con la sensibilidad pedida.
+def leer_cache(conexion, hash_pdf, sensibilidad, dpi):
+    filas = conexion.execute(
+        "SELECT pagina, sensibilidad, porcentaje, ancho, alto, minimo, maximo, histograma FROM paginas"
+        " WHERE hash = ? AND dpi = ? AND (sensibilidad = ? OR histograma IS NOT NULL)",
+        (hash_pdf, dpi, sensibilidad),
+    ).fetchall()
+    if filas:
+        with conexion:
+            conexion.execute(
+                "UPDATE paginas SET ultimo_uso = ? WHERE hash = ? AND dpi = ? AND (sensibilidad = ? OR histograma IS NOT NULL)",
+                (time.time(), hash_pdf, dpi, sensibilidad),
+            )
+    paginas = {}
+    for pagina, sensibilidad_fila, porcentaje, ancho, alto, minimo, maximo, blob in filas:
+        histograma = blob_a_histograma(blob)
+        if sensibilidad_fila == sensibilidad:
+            paginas[pagina] = (porcentaje, ancho, alto, minimo, maximo, histograma)
+        elif pagina not in paginas:
+            porcentaje = float(fraccion_desde_histograma(histograma, sensibilidad))
+            paginas[pagina] = (porcentaje, ancho, alto, porcentaje, porcentaje, histograma)
+    return paginas
+
+
+def guardar_cache(conexion, hash_pdf, sensibilidad, dpi, paginas):
+    ahora = time.time()
+    with conexion:
+        conexion.executemany(
+            "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(hash_pdf, pagina, sensibilidad, dpi, *datos[:5], histograma_a_blob(datos[5]), ahora) for pagina, datos in paginas.items()],
+        )
+    recortar_cache(conexion)
+
+
+# Borra las páginas usadas hace más tiempo hasta que la caché ocupe menos de cache_max_mb
+def recortar_cache(conexion):
+    tamano_pagina = conexion.execute("PRAGMA page_size").fetchone()[0]
+    limite = cache_max_mb * 1024 * 1024
+    while True:
+        paginas_db = conexion.execute("PRAGMA page_count").fetchone()[0]
+        paginas_libres = conexion.execute("PRAGMA freelist_count").fetchone()[0]
+        ocupado = (paginas_db - paginas_libres) * tamano_pagina
+        filas = conexion.execute("SELECT COUNT(*) FROM paginas").fetchone()[0]
+        if ocupado <= limite or filas == 0:
+            return
+        # Borrar en proporción al exceso (más un 10% de margen) para no recortar de a una fila
+        a_borrar = max(1, int(filas * ((ocupado - limite) / ocupado + 0.1)))
+        with conexion:
+            conexion.execute(
+                "DELETE FROM paginas WHERE rowid IN (SELECT rowid FROM paginas ORDER BY ultimo_uso LIMIT ?)",
+                (a_borrar,),
+            )
 
 
-precios_publico, precios_estudiante = cargar_precios()
-
-def obtener_precio(cantidad, tipo, usuario, porcentaje_color, color):
-    precios = precios_estudiante if usuario == "estudiante" else precios_publico
-
-    # Ajuste de precio según porcentaje de color
-    precio_color = 100 + (porcentaje_color * 500)  # Precio base $100 y máximo $600
-    if color:
-        precio_color = precio_color   
-        precio_color = min(precio_color, 600)  # Limitar a un máximo de $600
+def vaciar_cache():
+    conexion = abrir_cache()
+    try:
+        with conexion:
+            conexion.execute("DELETE FROM paginas")
+        conexion.execute("VACUUM")
+    finally:
+        conexion.close()
+
+
+class AnalisisCancelado(Exception):
+    pass
+
+
+# Contadores de memoria de Windows (GetProcessMemoryInfo, en psapi)
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    kernel32 = ctypes.WinDLL("kernel32")
+    psapi = ctypes.WinDLL("psapi")
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    psapi.GetProcessMemoryInfo.argtypes = (wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD)
+
+
+# (memoria actual, pico) del proceso (o de otro, por pid) en MB según Windows; None si falla
+def memoria_windows_mb(pid=None):
+    if pid is None:
+        proceso = kernel32.GetCurrentProcess()
     else:
-        precio_color = 0  # No hay ajuste por color si no es a color
+        proceso = kernel32.OpenProcess(0x1000 | 0x0010, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ
+        if not proceso:
+            return None
+    try:
+        contadores = PROCESS_MEMORY_COUNTERS()
+        contadores.cb = ctypes.sizeof(contadores)
+        if not psapi.GetProcessMemoryInfo(proceso, ctypes.byref(contadores), contadores.cb):
+            return None
+        return contadores.WorkingSetSize / 2**20, contadores.PeakWorkingSetSize / 2**20
+    finally:
+        if pid is not None:
+            kernel32.CloseHandle(proceso)
+
+
+# Memoria residente actual del proceso (o de otro, por pid) en MB; None si no se puede saber
+# (fuera de Linux y Windows el techo de memoria no se aplica)
+def memoria_residente_mb(pid=None):
+    if sys.platform == "win32":
+        memoria = memoria_windows_mb(pid)
+        return memoria[0] if memoria else None
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# MuPDF guarda en su caché de recursos (fuentes, imágenes decodificadas) referencias a cada
+# documento, así que un documento cerrado sigue ocupando memoria hasta que la caché lo desaloja,
+# y en PyMuPDF la caché no tiene límite. Se vacía al terminar cada documento: lo que tenía ya no
+# le sirve a ningún otro.
+def vaciar_cache_mupdf():
+    fitz.TOOLS.store_shrink(100)
+
+
+# Memoria que quedó en este proceso después de la última liberación (ver respetar_techo_memoria)
+_residente_tras_liberar = 0.0
+
+# Si el proceso supera el techo de memoria, vacía la caché de recursos de MuPDF sin esperar a
+# que termine el documento (un documento largo con muchas imágenes la llena solo) y junta la
+# basura pendiente. Si después de liberar el proceso sigue por encima del techo (el techo está por
+# debajo de lo que ocupa el proceso vacío), no se vuelve a liberar hasta que crezca
+# HISTERESIS_TECHO_MB más: si no, se vaciaría la caché en cada página. Devuelve True si hubo
+# que liberar.
+def respetar_techo_memoria(techo_mb=None):
+    global _residente_tras_liberar
+    if techo_mb is None:
+        techo_mb = memoria_max_mb
+    if not techo_mb:
+        return False
+    residente = memoria_residente_mb()
+    if residente is None or residente <= max(techo_mb, _residente_tras_liberar + HISTERESIS_TECHO_MB):
+        return False
+    vaciar_cache_mupdf()
+    gc.collect()
+    _residente_tras_liberar = memoria_residente_mb() or 0.0
+    return True
+
+
+# Estado de cada proceso del pool: un evento para cancelar y una cola para avisar cada página analizada
+_cancelar_worker = None
+_progreso_worker = None
+_documento_worker = None  # PDF del último tramo analizado por este proceso
+
+def inicializar_worker(evento_cancelar, cola_progreso):
+    global _cancelar_worker, _progreso_worker
+    _cancelar_worker = evento_cancelar
+    _progreso_worker = cola_progreso
+
+
+# Analiza una página para el análisis de un PDF: (porcentaje, metodo, ancho, alto, minimo, maximo,
+# histograma), con el tamaño en puntos, las cotas de la fracción de color y el histograma de
+# histograma_color. Con umbrales la página se analiza por franjas y, si se cortó antes de
+# terminar, queda acotada (metodo "franjas") en vez de exacta; el análisis por franjas no arma
+# histograma (None).
+def analizar_pagina_con_tamano(pagina, dpi, sensibilidad, cronometro=None, umbrales=None):
+    ancho, alto = pagina.rect.width, pagina.rect.height
+    if es_gris_sin_renderizar(pagina, sensibilidad, cronometro):
+        return 0.0, "vectorial", ancho, alto, 0.0, 0.0, HISTOGRAMA_GRIS
+    if umbrales is None:
+        histograma = obtener_histograma_color(pagina, dpi, cronometro)
+        porcentaje = float(fraccion_desde_histograma(histograma, sensibilidad))
+        return porcentaje, "raster", ancho, alto, porcentaje, porcentaje, histograma
+    porcentaje, minimo, maximo = obtener_porcentaje_color_franjas(pagina, umbrales, dpi, sensibilidad, cronometro)
+    return porcentaje, "franjas" if minimo < maximo else "raster", ancho, alto, minimo, maximo, None
+
+
+# Analiza las páginas indicadas de un PDF. Corre dentro de los procesos del pool:
+# cada uno abre su propio documento porque los objetos de fitz no se pueden serializar.
+# Cada página se renderiza, se reduce a su histograma y se suelta antes de pasar a la
+# siguiente, así cada proceso tiene un solo mapa de bits a la vez; techo_mb es memoria_max_mb
+# (los procesos no siempre heredan los ajustes del principal).
+# Devuelve (analizadas, tiempos por etapa o None si medir es False).
+def analizar_paginas(id_trabajo, ruta_pdf, indices, dpi, sensibilidad, medir=False, umbrales=None, techo_mb=0):
+    global _documento_worker
+    # Los tramos de un mismo PDF suelen caer seguidos en el mismo proceso: la caché de MuPDF se
+    # vacía recién al pasar a otro documento
+    if ruta_pdf != _documento_worker:
+        vaciar_cache_mupdf()
+        _documento_worker = ruta_pdf
+    cronometro = Cronometro() if medir else None
+    analizadas = []
+    with fitz.open(ruta_pdf) as doc:
+        if cronometro:
+            cronometro.marcar("abrir")
+        for i in indices:
+            if _cancelar_worker is not None and _cancelar_worker.is_set():
+                break
+            if cronometro:
+                cronometro.reiniciar()
+            pagina = doc[i]
+            if cronometro:
+                cronometro.marcar("cargar")
+            analizadas.append(analizar_pagina_con_tamano(pagina, dpi, sensibilidad, cronometro, umbrales))
+            del pagina
+            respetar_techo_memoria(techo_mb)
+            if _progreso_worker is not None:
+                _progreso_worker.put(id_trabajo)
+    return analizadas, cronometro.etapas if cronometro else None
+
+
+_pool = None
+_pool_procesos = 0
+_pool_cancelar = None
+_pool_progreso = None
+_ultimo_trabajo = 0
+
+def obtener_pool(procesos):
+    # El pool se reutiliza entre cálculos para no pagar el arranque de los procesos cada vez
+    global _pool, _pool_procesos, _pool_cancelar, _pool_progreso
+    if _pool is None or _pool_procesos != procesos:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        contexto = multiprocessing.get_context()
+        _pool_cancelar = contexto.Event()
+        _pool_progreso = contexto.Queue()
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=procesos, mp_context=contexto,
+            initializer=inicializar_worker, initargs=(_pool_cancelar, _pool_progreso),
+        )
+        _pool_procesos = procesos
+    return _pool
+
+
+# Resultado del análisis de un PDF, separado de los precios: arreglos de NumPy con un valor por
+# página analizada. Con esto se puede volver a cotizar con otras opciones sin abrir el PDF de nuevo.
+# Si el color se estimó por muestreo, los arreglos tienen sólo las páginas de la muestra, pesos
+# dice cuántas páginas del documento representa cada una y muestreo tiene la estimación.
+# Con con_color en False sólo se contaron las páginas (alcanza para blanco y negro) y los
+# arreglos están vacíos.
+class AnalisisPDF:
+    def __init__(self, ruta, color, ancho, alto, dpi, sensibilidad, metodos=None, etapas=None,
+                 paginas=None, pesos=None, total_paginas=None, muestreo=None, minimo=None, maximo=None,
+                 con_color=True, histogramas=None, estratos=None):
+        self.ruta = ruta
+        self.con_color = con_color
+        self.paginas = np.arange(len(color), dtype=np.int32) if paginas is None else np.asarray(paginas, dtype=np.int32)
+        self.color = np.asarray(color, dtype=np.float64)  # Fracción de la página con color (0..1)
+        self.ancho = np.asarray(ancho, dtype=np.float32)  # En puntos (1/72 de pulgada)
+        self.alto = np.asarray(alto, dtype=np.float32)
+        # Cotas de la fracción de color: iguales a color salvo en las páginas que el análisis por
+        # franjas dejó acotadas dentro de una banda sin terminar de analizarlas
+        self.color_minimo = self.color if minimo is None else np.asarray(minimo, dtype=np.float64)
+        self.color_maximo = self.color if maximo is None else np.asarray(maximo, dtype=np.float64)
+        self.pesos = np.ones(len(self.color)) if pesos is None else np.asarray(pesos, dtype=np.float64)
+        self.total_paginas = len(self.color) if total_paginas is None else total_paginas
+        # {"promedio", "minimo", "maximo"}: fracción de color promedio estimada y su intervalo de
+        # confianza del 95%. None si se analizaron todas las páginas.
+        self.muestreo = muestreo
+        self.estratos = estratos  # Tramos de la muestra (elegir_muestra), para volver a estimar
+        # Histograma de min(S, V) de cada página (histograma_color), una fila por página. None si
+        # alguna página no lo tiene (las del análisis por franjas).
+        self.histogramas = histogramas
+        self._acumulados = None
+        # Ajustes con los que se analizó: si cambian, el resultado ya no sirve
+        self.dpi = dpi
+        self.sensibilidad = sensibilidad
+        self.metodos = metodos or {}  # {metodo: páginas} de cómo se obtuvo cada página
+        self.etapas = etapas  # Tiempos por etapa del análisis ({etapa: (segundos, veces)}), si se midieron
+
+    @property
+    def num_paginas(self):
+        return self.total_paginas
+
+    @property
+    def area(self):
+        return self.ancho * self.alto
+
+    # El mismo análisis con otra sensibilidad, calculado desde los histogramas sin abrir el PDF.
+    # None si no hay histogramas. Las sumas acumuladas de los histogramas (píxeles con min(S, V)
+    # >= s, para cada s) se calculan una vez y sirven para cualquier sensibilidad.
+    def con_sensibilidad(self, sensibilidad):
+        if self.histogramas is None:
+            return None
+        if self._acumulados is None:
+            self._acumulados = self.histogramas[:, ::-1].cumsum(axis=1, dtype=np.int64)[:, ::-1]
+        color = self._acumulados[:, sensibilidad] / np.maximum(self._acumulados[:, 0], 1)
+        muestreo = None
+        if self.muestreo is not None:
+            muestreo = estimar_color(self.estratos, dict(zip(self.paginas.tolist(), color.tolist())))
+        return AnalisisPDF(
+            self.ruta, color, self.ancho, self.alto, self.dpi, sensibilidad, self.metodos, self.etapas,
+            paginas=self.paginas, pesos=self.pesos, total_paginas=self.total_paginas, muestreo=muestreo,
+            histogramas=self.histogramas, estratos=self.estratos,
+        )
 
-    for limite, precio in sorted(precios[tipo].items(), reverse=True):
-        if cantidad >= limite:
-            return int(precio + precio_color)
-    return 0
+    # Si el análisis sirve para cotizar con los ajustes actuales. En blanco y negro sólo importa
+    # la cantidad de páginas, que no depende de ningún ajuste.
+    def vigente(self, color=True):
+        if not color:
+            return True
+        if not self.con_color:
+            return False
+        if self.muestreo is not None and not (muestreo_desde and self.total_paginas >= muestreo_desde):
+            return False  # Se apagó el muestreo: hace falta el análisis completo
+        if self.muestreo is not None and muestra_insuficiente(
+            estimar_color(self.estratos, dict(zip(self.paginas.tolist(), self.color.tolist()))), self.total_paginas
+        ):
+            return False  # Con otras bandas o precios la muestra ya no alcanza para cotizar
+        if not bandas_definidas(self.color_minimo, self.color_maximo):
+            return False  # Cambiaron las bandas y alguna página acotada ya no tiene banda segura
+        return self.dpi == dpi_color and self.sensibilidad == sensitivity
+
+
+# True si cada página acotada entre minimo y maximo cae en una sola banda de color
+def bandas_definidas(minimo, maximo):
+    acotadas = minimo != maximo
+    if not np.any(acotadas):
+        return True
+    umbrales = tabla_precios.umbrales_color
+    return np.array_equal(
+        np.searchsorted(umbrales, minimo[acotadas], side="right"),
+        np.searchsorted(umbrales, maximo[acotadas], side="right"),
+    )
+
+
+# True si la muestra no alcanza para cotizar: el margen del intervalo de confianza del costo
+# estimado supera tolerancia_muestreo del costo. Cada página cuesta el precio base de su tramo
+# (se toma el del documento solo, al público) más el recargo de su banda, así que el margen del
+# costo es el del recargo promedio por página.
+def muestra_insuficiente(estimacion, num_paginas):
+    base = tabla_precios.precio_base(num_paginas, "simple", "publico") or 0
+    margen = estimacion["recargo_maximo"] - estimacion["recargo"]
+    return margen > tolerancia_muestreo * (base + estimacion["recargo"])
+
+
+# Muestra estratificada: las páginas se parten en tramos consecutivos de igual tamaño y de cada
+# tramo se eligen dos al azar (dos para poder estimar la varianza dentro del tramo). La semilla
+# sale del contenido del archivo, así el mismo PDF siempre da la misma estimación.
+# Devuelve [(inicio, fin, [páginas elegidas])], o None si la muestra sería todo el documento.
+def elegir_muestra(num_paginas, tamano, semilla):
+    estratos = max(1, tamano // 2)
+    if num_paginas <= 2 * estratos:
+        return None
+    rng = np.random.default_rng(semilla)
+    limites = np.linspace(0, num_paginas, estratos + 1).astype(int)
+    return [
+        (int(inicio), int(fin), sorted(rng.choice(np.arange(inicio, fin), 2, replace=False).tolist()))
+        for inicio, fin in zip(limites[:-1], limites[1:])
+    ]
+
+
+# Promedio estratificado de un valor por página y el margen de su intervalo de confianza del 95%
+# (aproximación normal, con corrección por población finita). valores[i] es el de la página i.
+def promedio_estratificado(estratos, valores):
+    total = estratos[-1][1]
+    promedio = 0.0
+    varianza = 0.0
+    for inicio, fin, indices in estratos:
+        muestra = np.array([valores[i] for i in indices], dtype=np.float64)
+        peso = (fin - inicio) / total
+        promedio += peso * muestra.mean()
+        varianza += peso ** 2 * (1 - len(muestra) / (fin - inicio)) * muestra.var(ddof=1) / len(muestra)
+    return promedio, 1.96 * math.sqrt(varianza)
+
+
+# Estimación por muestreo de un documento (fracciones[i] es la fracción de color de la página i):
+# la fracción de color promedio, para mostrar, y el recargo por color promedio por página con
+# las bandas actuales, que es lo que decide el precio. Cada uno con su intervalo del 95%.
+def estimar_color(estratos, fracciones):
+    indices = [i for _, _, elegidas in estratos for i in elegidas]
+    _, recargos = tabla_precios.bandas_color(np.array([fracciones[i] for i in indices], dtype=np.float64))
+    promedio, margen = promedio_estratificado(estratos, fracciones)
+    recargo, margen_recargo = promedio_estratificado(estratos, dict(zip(indices, recargos.tolist())))
+    return {
+        "promedio": promedio, "minimo": max(0.0, promedio - margen), "maximo": min(1.0, promedio + margen),
+        "recargo": recargo, "recargo_minimo": max(0.0, recargo - margen_recargo), "recargo_maximo": recargo + margen_recargo,
+    }
 
 
+# Histogramas de las páginas de un archivo en un arreglo (páginas x 256), o None si falta alguno
+def apilar_histogramas(histogramas):
+    if any(histograma is None for histograma in histogramas):
+        return None
+    return np.stack(histogramas) if histogramas else np.zeros((0, 256), dtype=np.uint32)
+
+
+# Devuelve ({ruta: AnalisisPDF}, {metodo: páginas}) repartiendo las páginas entre procesos.
+# Las páginas que ya están en la caché no se vuelven a analizar.
+# progreso(paginas_hechas, paginas_totales) se llama por cada página y archivo_listo(ruta) cuando
+# todas las páginas de un archivo están analizadas; si se activa el evento cancelar, el análisis
+# se corta dentro de la página en curso y se lanza AnalisisCancelado.
+# Con medir (por defecto, el ajuste medir_etapas) cada AnalisisPDF trae sus tiempos por etapa;
+# los de las páginas analizadas en el pool son la suma de lo que tardó cada proceso.
+# Con muestreo_desde > 0, en los PDFs de al menos esa cantidad de páginas se analiza sólo una
+# muestra de muestreo_paginas; si el margen del costo estimado supera tolerancia_muestreo
+# (muestra_insuficiente), se analiza el resto del documento.
+# Con analisis_por_franjas las páginas rasterizadas se analizan por franjas y pueden quedar
+# acotadas dentro de su banda de color (ver obtener_porcentaje_color_franjas).
+# Con solo_paginas no se analiza el color: sólo se cuentan las páginas de cada PDF, que es lo
+# único que necesita una cotización en blanco y negro.
+def analizar_pdfs(ruta_pdfs, procesos=None, progreso=None, cancelar=None, usar_cache=True, archivo_listo=None, medir=None, solo_paginas=False):
+    if procesos is None:
+        procesos = num_procesos
+    if medir is None:
+        medir = medir_etapas
+    dpi, sensibilidad = dpi_color, sensitivity
+    umbrales = tabla_precios.umbrales_color if analisis_por_franjas else None
+    cronometros = {ruta_pdf: Cronometro() for ruta_pdf in ruta_pdfs} if medir else {}
+
+    # {ruta: [(porcentaje, ancho, alto, minimo, maximo, histograma) de cada página]}; None mientras
+    # la página falte analizar
+    resultados = {}
+    for ruta_pdf in ruta_pdfs:
+        cronometro = cronometros.get(ruta_pdf)
+        if cronometro:
+            cronometro.reiniciar()
+        # len(doc) sale del árbol de páginas: no se carga el contenido de ninguna
+        with fitz.open(ruta_pdf) as doc:
+            resultados[ruta_pdf] = [None] * len(doc)
+        if cronometro:
+            cronometro.marcar("abrir")
+
+    if solo_paginas:
+        analisis_archivos = {}
+        for ruta_pdf, paginas in resultados.items():
+            analisis_archivos[ruta_pdf] = AnalisisPDF(
+                ruta_pdf, (), (), (), dpi, sensibilidad, etapas=cronometros[ruta_pdf].etapas if medir else None,
+                total_paginas=len(paginas), con_color=False,
+            )
+            if archivo_listo:
+                archivo_listo(ruta_pdf)
+        return analisis_archivos, {"cache": 0, "vectorial": 0, "raster": 0, "franjas": 0}
 
-def obtener_porcentaje_color(pagina):
-    # Convertir la página a una imagen de PIL
-    pix = pagina.get_pixmap()
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    # Completar con la caché y anotar qué páginas faltan analizar en cada archivo
+    conexion = abrir_cache() if usar_cache else None
+    try:
+        hashes = {}
+        for ruta_pdf, paginas in resultados.items():
+            if conexion is not None:
+                cronometro = cronometros.get(ruta_pdf)
+                if cronometro:
+                    cronometro.reiniciar()
+                hashes[ruta_pdf] = hash_archivo(ruta_pdf)
+                for pagina, datos in leer_cache(conexion, hashes[ruta_pdf], sensibilidad, dpi).items():
+                    # Una página acotada sólo sirve si sigue cayendo en una sola banda
+                    if pagina < len(paginas) and bandas_definidas(np.array([datos[3]]), np.array([datos[4]])):
+                        paginas[pagina] = datos
+                if cronometro:
+                    cronometro.marcar("cache")
+
+        # Archivos grandes que se estiman por muestreo (si ya están enteros en la caché, no)
+        muestras = {}
+        for ruta_pdf, paginas in resultados.items():
+            if muestreo_desde and len(paginas) >= muestreo_desde and None in paginas:
+                semilla = int(hashes.get(ruta_pdf) or hash_archivo(ruta_pdf), 16)
+                estratos = elegir_muestra(len(paginas), muestreo_paginas, semilla)
+                if estratos is not None:
+                    muestras[ruta_pdf] = estratos
+
+        pendientes_por_archivo = {}
+        total_paginas = 0
+        for ruta_pdf, paginas in resultados.items():
+            if ruta_pdf in muestras:
+                a_considerar = [i for _, _, indices in muestras[ruta_pdf] for i in indices]
+            else:
+                a_considerar = range(len(paginas))
+            pendientes_por_archivo[ruta_pdf] = [i for i in a_considerar if paginas[i] is None]
+            total_paginas += len(a_considerar)
+        paginas_pendientes = sum(len(indices) for indices in pendientes_por_archivo.values())
+        paginas_hechas = total_paginas - paginas_pendientes
+        conteo_archivos = {ruta_pdf: {"cache": 0, "vectorial": 0, "raster": 0, "franjas": 0} for ruta_pdf in resultados}
+
+        # Los archivos muestreados avisan que están listos recién cuando se decide si alcanza la muestra
+        en_espera = set(muestras)
+
+        def listo(ruta_pdf):
+            if archivo_listo and ruta_pdf not in en_espera:
+                archivo_listo(ruta_pdf)
+
+        if progreso:
+            progreso(paginas_hechas, total_paginas)
+        for ruta_pdf, indices in pendientes_por_archivo.items():
+            if not indices:
+                listo(ruta_pdf)
+
+        def analizar_pendientes(pendientes_por_archivo):
+            nonlocal paginas_hechas
+            paginas_pendientes = sum(len(indices) for indices in pendientes_por_archivo.values())
+
+            # Con un solo proceso (o trabajos muy chicos) se analiza en serie, sin el costo del pool
+            if procesos <= 1 or paginas_pendientes < 2 * procesos:
+                for ruta_pdf, indices in pendientes_por_archivo.items():
+                    if not indices:
+                        continue
+                    cronometro = cronometros.get(ruta_pdf)
+                    if cronometro:
+                        cronometro.reiniciar()
+                    with fitz.open(ruta_pdf) as doc:
+                        if cronometro:
+                            cronometro.marcar("abrir")
+                        for i in indices:
+                            if cancelar is not None and cancelar.is_set():
+                                raise AnalisisCancelado()
+                            if cronometro:
+                                cronometro.reiniciar()
+                            pagina = doc[i]
+                            if cronometro:
+                                cronometro.marcar("cargar")
+                            porcentaje, metodo, *datos = analizar_pagina_con_tamano(pagina, dpi, sensibilidad, cronometro, umbrales)
+                            del pagina
+                            respetar_techo_memoria()
+                            resultados[ruta_pdf][i] = (porcentaje, *datos)
+                            conteo_archivos[ruta_pdf][metodo] += 1
+                            paginas_hechas += 1
+                            if progreso:
+                                progreso(paginas_hechas, total_paginas)
+                    vaciar_cache_mupdf()
+                    listo(ruta_pdf)
+            else:
+                analizar_en_pool(pendientes_por_archivo, resultados, conteo_archivos, procesos, dpi, sensibilidad, paginas_hechas, total_paginas, progreso, cancelar, listo, cronometros, umbrales)
+                paginas_hechas += paginas_pendientes
+
+            if conexion is not None:
+                for ruta_pdf, indices in pendientes_por_archivo.items():
+                    if indices:
+                        cronometro = cronometros.get(ruta_pdf)
+                        if cronometro:
+                            cronometro.reiniciar()
+                        nuevos = {i: resultados[ruta_pdf][i] for i in indices}
+                        guardar_cache(conexion, hashes[ruta_pdf], sensibilidad, dpi, nuevos)
+                        if cronometro:
+                            cronometro.marcar("cache")
+
+        analizar_pendientes(pendientes_por_archivo)
+
+        # Estimar el color de cada muestra; si el intervalo no alcanza para decidir la banda, análisis completo
+        estimaciones = {}
+        completar = {}
+        for ruta_pdf, estratos in muestras.items():
+            estimacion = estimar_color(estratos, [datos[0] if datos else None for datos in resultados[ruta_pdf]])
+            en_espera.discard(ruta_pdf)
+            if muestra_insuficiente(estimacion, len(resultados[ruta_pdf])):
+                completar[ruta_pdf] = [i for i, datos in enumerate(resultados[ruta_pdf]) if datos is None]
+                if not completar[ruta_pdf]:
+                    listo(ruta_pdf)
+            else:
+                estimaciones[ruta_pdf] = estimacion
+                listo(ruta_pdf)
+        if completar:
+            total_paginas += sum(len(indices) for indices in completar.values())
+            analizar_pendientes(completar)
+    finally:
+        if conexion is not None:
+            conexion.close()
+
+    analisis_archivos = {}
+    conteo_metodos = {"cache": 0, "vectorial": 0, "raster": 0, "franjas": 0}
+    for ruta_pdf, paginas in resultados.items():
+        etapas = cronometros[ruta_pdf].etapas if medir else None
+        if ruta_pdf in estimaciones:
+            indices, pesos = [], []
+            for inicio, fin, elegidas in muestras[ruta_pdf]:
+                indices.extend(elegidas)
+                pesos.extend([(fin - inicio) / len(elegidas)] * len(elegidas))
+            color, ancho, alto, minimo, maximo, histogramas = zip(*(paginas[i] for i in indices))
+            analisis_archivos[ruta_pdf] = AnalisisPDF(
+                ruta_pdf, color, ancho, alto, dpi, sensibilidad, conteo_archivos[ruta_pdf], etapas,
+                paginas=indices, pesos=pesos, total_paginas=len(paginas), muestreo=estimaciones[ruta_pdf],
+                minimo=minimo, maximo=maximo, histogramas=apilar_histogramas(histogramas), estratos=muestras[ruta_pdf],
+            )
+        else:
+            color, ancho, alto, minimo, maximo, histogramas = zip(*paginas) if paginas else ((), (), (), (), (), ())
+            analisis_archivos[ruta_pdf] = AnalisisPDF(
+                ruta_pdf, color, ancho, alto, dpi, sensibilidad, conteo_archivos[ruta_pdf], etapas,
+                minimo=minimo, maximo=maximo, histogramas=apilar_histogramas(histogramas),
+            )
+        # Las páginas consideradas que no hubo que analizar salieron de la caché
+        analizadas = sum(paginas_metodo for metodo, paginas_metodo in conteo_archivos[ruta_pdf].items() if metodo != "cache")
+        conteo_archivos[ruta_pdf]["cache"] = len(analisis_archivos[ruta_pdf].color) - analizadas
+        for metodo, paginas_metodo in conteo_archivos[ruta_pdf].items():
+            conteo_metodos[metodo] += paginas_metodo
+
+    vaciar_cache_mupdf()
+    respetar_techo_memoria()
+    if progreso:
+        progreso(total_paginas, total_paginas)
+    return analisis_archivos, conteo_metodos
+
+
+def analizar_en_pool(pendientes_por_archivo, resultados, conteo_archivos, procesos, dpi, sensibilidad, paginas_hechas, total_paginas, progreso, cancelar, archivo_listo=None, cronometros=None, umbrales=None):
+    global _ultimo_trabajo
+    paginas_pendientes = sum(len(indices) for indices in pendientes_por_archivo.values())
+
+    # Partir cada archivo en tramos de páginas, varios por proceso para repartir bien la carga
+    tamano_tramo = max(1, min(32, math.ceil(paginas_pendientes / (procesos * 4))))
+    pool = obtener_pool(procesos)
+    _pool_cancelar.clear()
+    _ultimo_trabajo += 1
+    id_trabajo = _ultimo_trabajo
+    tramos = {}
+    restantes = {ruta_pdf: len(indices) for ruta_pdf, indices in pendientes_por_archivo.items() if indices}
+    for ruta_pdf, indices in pendientes_por_archivo.items():
+        for inicio in range(0, len(indices), tamano_tramo):
+            tramo = indices[inicio:inicio + tamano_tramo]
+            futuro = pool.submit(analizar_paginas, id_trabajo, ruta_pdf, tramo, dpi, sensibilidad, bool(cronometros), umbrales, memoria_max_mb)
+            tramos[futuro] = (ruta_pdf, tramo)
+
+    pendientes = set(tramos)
+    while pendientes:
+        terminados, pendientes = concurrent.futures.wait(pendientes, timeout=0.05, return_when=concurrent.futures.FIRST_COMPLETED)
+
+        if cancelar is not None and cancelar.is_set():
+            # Los tramos en curso terminan en la página actual; los que no empezaron no corren
+            _pool_cancelar.set()
+            for futuro in pendientes:
+                futuro.cancel()
+            concurrent.futures.wait(pendientes)
+            raise AnalisisCancelado()
+
+        for futuro in terminados:
+            ruta_pdf, tramo = tramos[futuro]
+            try:
+                analizadas, etapas = futuro.result()
+            except Exception:
+                # Si un tramo falla no tiene sentido seguir con el resto del trabajo
+                _pool_cancelar.set()
+                for pendiente in pendientes:
+                    pendiente.cancel()
+                raise
+            for i, (porcentaje, metodo, *datos) in zip(tramo, analizadas):
+                resultados[ruta_pdf][i] = (porcentaje, *datos)
+                conteo_archivos[ruta_pdf][metodo] += 1
+            if etapas:
+                cronometros[ruta_pdf].sumar(etapas)
+            restantes[ruta_pdf] -= len(tramo)
+            if restantes[ruta_pdf] == 0 and archivo_listo:
+                archivo_listo(ruta_pdf)
+
+        # Avisos por página de los procesos (se descartan los de trabajos cancelados anteriores)
+        try:
+            while True:
+                if _pool_progreso.get_nowait() == id_trabajo:
+                    paginas_hechas += 1
+        except queue.Empty:
+            pass
+        if progreso:
+            progreso(min(paginas_hechas, total_paginas), total_paginas)
+
+
+# Calcula el costo total y el detalle por archivo a partir de los análisis (lista de AnalisisPDF)
+# Devuelve (total_costo, {ruta: (num_paginas, costo)}, desglose_paginas). En las copias a color
+# cada página paga el precio del tramo más el recargo de su banda de color, y desglose_paginas
+# tiene {ruta: (paginas, bandas, precios, pesos)} con un valor por página analizada; en blanco y
+# negro queda vacío. En un análisis por muestreo cada página de la muestra cuenta tantas veces
+# como su peso, así que el costo del archivo es una estimación.
+def calcular_costos(analisis_archivos, doble_faz=False, usuario="publico", color=False):
+    detalles_archivos = {}
+    desglose_paginas = {}
+    total_paginas = sum(analisis.num_paginas for analisis in analisis_archivos)
 
-    # Convertir la imagen de PIL a un arreglo de NumPy
-    img_np = np.array(img)
+    if color:
+        sin_color = [os.path.basename(analisis.ruta) for analisis in analisis_archivos if not analisis.con_color]
+        if sin_color:
+            raise ValueError(f"falta analizar el color de {', '.join(sin_color)}")
+        # Todas las páginas del trabajo en un solo arreglo: bandas y recargos de una vez
+        fracciones = np.concatenate([analisis.color for analisis in analisis_archivos]) if analisis_archivos else np.zeros(0)
+        pesos = np.concatenate([analisis.pesos for analisis in analisis_archivos]) if analisis_archivos else np.zeros(0)
+        bandas, recargos = tabla_precios.bandas_color(fracciones)
+        precio_base = tabla_precios.precio_base(total_paginas, "simple", usuario)
+        precios_paginas = recargos + precio_base if precio_base is not None else np.zeros_like(recargos)
+
+        total_costo_archivos = 0
+        inicio = 0
+        for analisis in analisis_archivos:
+            fin = inicio + len(analisis.color)
+            costo_archivo = int(round(float(np.dot(pesos[inicio:fin], precios_paginas[inicio:fin]))))
+            detalles_archivos[analisis.ruta] = (analisis.num_paginas, costo_archivo)
+            desglose_paginas[analisis.ruta] = (analisis.paginas, bandas[inicio:fin], precios_paginas[inicio:fin], pesos[inicio:fin])
+            total_costo_archivos += costo_archivo
+            inicio = fin
+        return total_costo_archivos, detalles_archivos, desglose_paginas
+
+    # Cálculo del total de páginas a considerar para el precio
+    if doble_faz:
+        paginas_para_precio = (total_paginas + 1) // 2  # Redondear hacia arriba
+        tipo = "doble"
+    else:
+        paginas_para_precio = total_paginas
+        tipo = "simple"
+
+    # Calcular el costo total basado en el total de páginas
+    precio_fotocopia = obtener_precio(paginas_para_precio, tipo, usuario)
+    total_costo_archivos = paginas_para_precio * precio_fotocopia
+
+    # Calcular el costo individual para cada archivo
+    for analisis in analisis_archivos:
+        num_paginas = analisis.num_paginas
+        paginas_para_precio_individual = (num_paginas + 1) // 2 if doble_faz else num_paginas
+        costo_archivo = paginas_para_precio_individual * precio_fotocopia
+        detalles_archivos[analisis.ruta] = (num_paginas, costo_archivo)
+
+    return total_costo_archivos, detalles_archivos, desglose_paginas
+
+
+# Analiza los PDFs en un hilo aparte mientras la ventana de progreso sigue respondiendo.
+# Al terminar llama a al_terminar(analisis_archivos, conteo_metodos), con la lista de AnalisisPDF
+# en el orden de ruta_pdfs, para cotizar con cotizar(); si se cancela o falla no la llama.
+# listos son archivos de la selección que ya estaban analizados: sólo se muestran como hechos.
+# Si se pasa un cronómetro, se le suma como "interfaz" el tiempo de actualizar la ventana.
+def calcular_precios(root, ruta_pdfs, al_terminar=None, listos=(), cronometro=None):
+    cola = queue.Queue()
+    cancelar = threading.Event()
+
+    # Crear la ventana de progreso
+    progress_window = Toplevel(root)
+    progress_window.title("Procesando PDFs")
+    progress_window.geometry("500x360")
+    progress_window.grab_set()
+
+    # Lista de archivos con su estado, para ver cuáles ya están hechos
+    lista_archivos = ttk.Treeview(progress_window, columns=("estado",), height=8)
+    lista_archivos.heading("#0", text="Archivo")
+    lista_archivos.heading("estado", text="Estado")
+    lista_archivos.column("estado", width=120, stretch=False)
+    lista_archivos.pack(fill="x", padx=10, pady=(10, 0))
+    for ruta_pdf in listos:
+        lista_archivos.insert("", "end", text=os.path.basename(ruta_pdf), values=("Listo",))
+    filas_archivos = {
+        ruta_pdf: lista_archivos.insert("", "end", text=os.path.basename(ruta_pdf), values=("Pendiente",))
+        for ruta_pdf in ruta_pdfs
+    }
 
-    # Convertir la imagen a espacio de color HSV
-    hsv = cv2.cvtColor(img_np, cv2.COLOR_RGB2HSV)
+    # Crear la barra de progreso
+    progress_bar = ttk.Progressbar(progress_window, length=300, mode='determinate')
+    progress_bar.pack(pady=20)
+
+    label_progreso = ttk.Label(progress_window, text="Abriendo archivos...")
+    label_progreso.pack()
+
+    def cancelar_trabajo():
+        cancelar.set()
+        label_progreso.config(text="Cancelando...")
+        btn_cancelar.config(state="disabled")
+
+    btn_cancelar = ttk.Button(progress_window, text="Cancelar", command=cancelar_trabajo, bootstyle="danger")
+    btn_cancelar.pack(pady=10)
+    progress_window.protocol("WM_DELETE_WINDOW", cancelar_trabajo)
+
+    def trabajo():
+        try:
+            analisis_archivos, conteo_metodos = analizar_pdfs(
+                ruta_pdfs,
+                progreso=lambda hechas, totales: cola.put(("progreso", hechas, totales)),
+                cancelar=cancelar,
+                archivo_listo=lambda ruta_pdf: cola.put(("archivo", ruta_pdf)),
+            )
+            cola.put(("fin", [analisis_archivos[ruta_pdf] for ruta_pdf in ruta_pdfs], conteo_metodos))
+        except AnalisisCancelado:
+            cola.put(("cancelado",))
+        except Exception as e:
+            cola.put(("error", e))
+
+    def revisar_cola():
+        # Sólo el hilo de Tk toca los widgets: el hilo de trabajo se comunica por la cola
+        if cronometro:
+            cronometro.reiniciar()
+        try:
+            while True:
+                mensaje = cola.get_nowait()
+                if mensaje[0] == "progreso":
+                    _, hechas, totales = mensaje
+                    progress_bar['maximum'] = totales
+                    progress_bar['value'] = hechas
+                    if not cancelar.is_set():
+                        label_progreso.config(text=f"Página {hechas} de {totales}")
+                    continue
+                if mensaje[0] == "archivo":
+                    fila = filas_archivos[mensaje[1]]
+                    lista_archivos.set(fila, "estado", "Listo")
+                    lista_archivos.see(fila)
+                    continue
+
+                # Cerrar la ventana de progreso
+                progress_window.destroy()
+                if cronometro:
+                    cronometro.marcar("interfaz")
+                if mensaje[0] == "fin":
+                    if al_terminar:
+                        al_terminar(mensaje[1], mensaje[2])
+                elif mensaje[0] == "error":
+                    messagebox.showerror("Error", f"No se pudo abrir el archivo PDF: {mensaje[1]}")
+                return
+        except queue.Empty:
+            pass
+        if cronometro:
+            cronometro.marcar("interfaz")
+        root.after(50, revisar_cola)
+
+    threading.Thread(target=trabajo, daemon=True).start()
+    root.after(50, revisar_cola)
 
-    # Definir umbral para detectar colores (excluyendo blanco y negro)
-    lower_color = np.array([sensitivity, sensitivity, sensitivity])  # Usar sensibilidad global
-    upper_color = np.array([179, 255, 255])  # Umbral máximo para colores
 
-    # Crear una máscara para los colores
-    mask = cv2.inRange(hsv, lower_color, upper_color)
+def obtener_precio_anillado(total_hojas, usuario, color):
+    if total_hojas <= 100:
+        key = "hasta_100"
+    elif total_hojas <= 200:
+        key = "hasta_200"
+    else:
+        key = "mas_de_200"
 
-    # Calcular el porcentaje de área coloreada
-    color_percentage = np.sum(mask > 0) / mask.size
+    precios = precios_anillado[key]
+    precio_base = precios[usuario]
+    precio_color = precios["color"] if color else 0
 
-    return color_percentage
+    return precio_base + precio_color
 
-def calcular_precios(root, ruta_pdfs, doble_faz=False, usuario="publico", color=False):
-    detalles_archivos = {}
-    try:
-        total_paginas = 0
-        color_paginas = 0
-        num_paginas_archivos = {}  # Diccionario para almacenar el número de páginas por archivo
 
-        # Crear la ventana de progreso
-        progress_window = Toplevel(root)
-        progress_window.title("Procesando PDFs")
-        progress_window.geometry("400x100")
+# Núcleo de precios común a la ventana y a la línea de comandos: costo de las copias más el
+# anillado si corresponde. Devuelve (total_costo, detalles_archivos, precio_anillado o None,
+# desglose_paginas) con el desglose por página de calcular_costos.
+def cotizar(analisis_archivos, doble_faz=False, usuario="publico", color=False, anillado=False):
+    total_costo, detalles_archivos, desglose_paginas = calcular_costos(analisis_archivos, doble_faz, usuario, color)
+    precio_anillado = None
+    if anillado:
+        total_hojas = sum(hojas for hojas, _ in detalles_archivos.values())
+        precio_anillado = obtener_precio_anillado(total_hojas, usuario, color)
+        total_costo += precio_anillado
+    return total_costo, detalles_archivos, precio_anillado, desglose_paginas
+
+
+# Calibración de la sensibilidad: para cada valor, la fracción de color promedio del trabajo y el
+# total de la cotización a color, calculados desde los histogramas de las páginas sin volver a
+# renderizar. Devuelve [(sensibilidad, fraccion, total)].
+def barrer_sensibilidad(analisis_archivos, sensibilidades, doble_faz=False, usuario="publico", anillado=False):
+    sin_histograma = [os.path.basename(analisis.ruta) for analisis in analisis_archivos if analisis.histogramas is None]
+    if sin_histograma:
+        raise ValueError(f"no hay histogramas de color de {', '.join(sin_histograma)}")
+    total_paginas = sum(analisis.num_paginas for analisis in analisis_archivos)
+    barrido = []
+    for sensibilidad in sensibilidades:
+        derivados = [analisis.con_sensibilidad(sensibilidad) for analisis in analisis_archivos]
+        fraccion = sum(float(np.dot(analisis.pesos, analisis.color)) for analisis in derivados) / max(total_paginas, 1)
+        total = cotizar(derivados, doble_faz, usuario, True, anillado)[0]
+        barrido.append((sensibilidad, fraccion, total))
+    return barrido
+
+
+# Conversores a PDF por extensión. Corren dentro de los procesos del pool, así que tienen
+# que ser funciones de módulo; cada uno recibe el archivo de origen y el PDF a escribir.
+def convertir_imagen(origen, destino):
+    from PIL import Image
+
+    with Image.open(origen) as imagen:
+        imagen.convert("RGB").save(destino, "PDF")
+
+
+LINEAS_POR_PAGINA = 60  # Líneas de un .txt que entran en una página A4 con letra de 10 puntos
+CARACTERES_POR_LINEA = 90  # Caracteres que entran entre los márgenes de una página A4 a 10 puntos
+
+# Las líneas más largas que la página se parten (textwrap) antes de paginar, así cada página
+# recibe LINEAS_POR_PAGINA líneas ya partidas y nada se sale por el margen derecho
+def convertir_texto(origen, destino):
+    with open(origen, "r", encoding="utf-8", errors="replace") as f:
+        lineas = [
+            partida
+            for linea in f.read().splitlines()
+            for partida in (textwrap.wrap(linea, CARACTERES_POR_LINEA, replace_whitespace=False) or [""])
+        ]
+    with fitz.open() as doc:
+        # Una página nueva cada LINEAS_POR_PAGINA líneas (y al menos una, aunque el texto esté vacío)
+        for inicio in range(0, max(len(lineas), 1), LINEAS_POR_PAGINA):
+            pagina = doc.new_page()
+            pagina.insert_text((72, 72), "\n".join(lineas[inicio:inicio + LINEAS_POR_PAGINA]), fontsize=10)
+        doc.save(destino)
+
+
+def copiar_pdf(origen, destino):
+    shutil.copyfile(origen, destino)
+
+
+CONVERSORES = {
+    ".jpg": convertir_imagen, ".jpeg": convertir_imagen, ".png": convertir_imagen,
+    ".bmp": convertir_imagen, ".tiff": convertir_imagen, ".tif": convertir_imagen,
+    ".txt": convertir_texto,
+    ".pdf": copiar_pdf,
+}
 
-        # Crear la barra de progreso
-        progress_bar = ttk.Progressbar(progress_window, length=300, mode='determinate')
-        progress_bar.pack(pady=20)
 
-        # Establecer el valor máximo de la barra de progreso
-        progress_bar['maximum'] = len(ruta_pdfs)
+def convertir_archivo(origen, destino):
+    CONVERSORES[os.path.splitext(origen)[1].lower()](origen, destino)
 
-        for i, ruta_pdf in enumerate(ruta_pdfs):
-            doc = fitz.open(ruta_pdf)
-            num_paginas = len(doc)
-            total_paginas += num_paginas
 
-            color_paginas += sum(obtener_porcentaje_color(pagina) for pagina in doc)
-            
-            num_paginas_archivos[ruta_pdf] = num_paginas  # Guardar el número de páginas por archivo
+# Backends para los documentos de Office. Word (docx2pdf) y LibreOffice no soportan varias
+# conversiones a la vez desde el mismo usuario, así que pasan de a una por _lock_office.
+EXTENSIONES_OFFICE = {".doc", ".docx", ".odt", ".rtf"}
+_lock_office = threading.Lock()
 
-            # Actualizar la barra de progreso
-            progress_bar['value'] = i + 1
-            progress_window.update()
+def convertir_con_docx2pdf(origen, destino):
+    from docx2pdf import convert as convert_docx
 
-        # Cálculo del porcentaje de color promedio
-        porcentaje_color_promedio = color_paginas / total_paginas
+    try:
+        import pythoncom  # Word se maneja por COM, que hay que iniciar en cada hilo
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+    convert_docx(origen, destino)
+
+
+def buscar_soffice():
+    for nombre in ("soffice", "libreoffice"):
+        ejecutable = shutil.which(nombre)
+        if ejecutable:
+            return ejecutable
+    if sys.platform == "win32":
+        for carpeta in (os.environ.get("ProgramFiles", ""), os.environ.get("ProgramFiles(x86)", "")):
+            ejecutable = os.path.join(carpeta, "LibreOffice", "program", "soffice.exe")
+            if carpeta and os.path.exists(ejecutable):
+                return ejecutable
+    return None
+
+
+def convertir_con_libreoffice(origen, destino):
+    soffice = buscar_soffice()
+    if soffice is None:
+        raise RuntimeError("no se encontró LibreOffice (soffice)")
+    # soffice elige el nombre de salida (el del origen con .pdf): se convierte en una carpeta
+    # temporal y después se mueve al destino
+    with tempfile.TemporaryDirectory() as carpeta:
+        subprocess.run(
+            [soffice, "--headless", "--convert-to", "pdf", "--outdir", carpeta, origen],
+            check=True, capture_output=True, timeout=300,
+        )
+        generado = os.path.join(carpeta, os.path.splitext(os.path.basename(origen))[0] + ".pdf")
+        if not os.path.exists(generado):
+            raise RuntimeError("LibreOffice no generó el PDF")
+        shutil.move(generado, destino)
 
-        # Cálculo del total de páginas a considerar para el precio
-        if doble_faz and not color:
-            paginas_para_precio = (total_paginas + 1) // 2  # Redondear hacia arriba
-            tipo = "doble"
-        else:
-            paginas_para_precio = total_paginas
-            tipo = "simple"
 
-        # Calcular el costo total basado en el total de páginas
-        precio_fotocopia = obtener_precio(paginas_para_precio, tipo, usuario, porcentaje_color_promedio, color)
-        total_costo_archivos = paginas_para_precio * precio_fotocopia
+BACKENDS_OFFICE = {
+    "docx2pdf": convertir_con_docx2pdf,
+    "libreoffice": convertir_con_libreoffice,
+}
+backend_office = None  # Nombre en BACKENDS_OFFICE; None = docx2pdf en Windows y LibreOffice en el resto
 
-        # Calcular el costo individual para cada archivo
-        for ruta_pdf in ruta_pdfs:
-            num_paginas = num_paginas_archivos[ruta_pdf]
-            paginas_para_precio_individual = (num_paginas + 1) // 2 if doble_faz and not color else num_paginas
-            costo_archivo = paginas_para_precio_individual * precio_fotocopia
-            detalles_archivos[ruta_pdf] = (num_paginas, costo_archivo)
 
-        # Cerrar la ventana de progreso
-        progress_window.destroy()
+def obtener_backend_office():
+    return BACKENDS_OFFICE[backend_office or ("docx2pdf" if sys.platform == "win32" else "libreoffice")]
 
-        return total_costo_archivos, detalles_archivos
-    except Exception as e:
-        messagebox.showerror("Error", f"No se pudo abrir el archivo PDF: {e}")
-        return None, None
 
+def convertir_office(origen, destino, backend=None):
+    with _lock_office:
+        (backend or obtener_backend_office())(origen, destino)
 
 
-def obtener_precio_anillado(total_hojas, usuario, color):
-    if total_hojas <= 100:
-        key = "hasta_100"
-    elif total_hojas <= 200:
-        key = "hasta_200"
-    else:
-        key = "mas_de_200"
+# PDF de salida para cada archivo, en la carpeta indicada y sin pisar otro de la misma tanda
+# ni uno que ya exista (informe.docx e informe.txt -> informe.pdf e informe (2).pdf)
+def destinos_conversion(archivos, carpeta_salida):
+    destinos = {}
+    usados = set()
+    for origen in archivos:
+        base = os.path.splitext(os.path.basename(origen))[0]
+        destino = os.path.join(carpeta_salida, base + ".pdf")
+        n = 2
+        while destino in usados or os.path.exists(destino):
+            destino = os.path.join(carpeta_salida, f"{base} ({n}).pdf")
+            n += 1
+        usados.add(destino)
+        destinos[origen] = destino
+    return destinos
 
-    precios = precios_anillado[key]
-    precio_base = precios[usuario]
-    precio_color = precios["color"] if color else 0
 
-    return precio_base + precio_color
-    
+# Borra un PDF de salida si existe (sirve de callback de un futuro, que se pasa como segundo argumento)
+def borrar_destino(destino, futuro=None):
+    try:
+        os.remove(destino)
+    except OSError:
+        pass
+
+
+# Convierte una tanda de archivos a PDF dentro de carpeta_salida. Las imágenes y los textos se
+# reparten en el pool de procesos del análisis (con un solo proceso, en un hilo aparte); los
+# documentos de Office van de a uno por el backend de Office, en un hilo aparte, mientras el pool
+# sigue trabajando. Llama a
+# progreso(origen, destino, error) al terminar cada archivo y devuelve
+# {origen: (destino o None, error o None)} en el orden de archivos. Si se cancela, los archivos
+# que no llegaron a terminar no dejan su PDF (ni a medio escribir) en la carpeta de salida.
+def convertir_archivos(archivos, carpeta_salida, procesos=None, progreso=None, cancelar=None, backend=None):
+    procesos = procesos or num_procesos
+    destinos = destinos_conversion(archivos, carpeta_salida)
+    resultados = {}
+
+    def terminar(origen, error):
+        resultados[origen] = (None, error) if error else (destinos[origen], None)
+        if progreso:
+            progreso(origen, resultados[origen][0], error)
+
+    comunes, office = [], []
+    for origen in archivos:
+        extension = os.path.splitext(origen)[1].lower()
+        if extension in EXTENSIONES_OFFICE:
+            office.append(origen)
+        elif extension in CONVERSORES:
+            comunes.append(origen)
+        else:
+            terminar(origen, "tipo de archivo no soportado")
+
+    futuros = {}
+    hilo = None
+    try:
+        if len(comunes) > 1 and procesos > 1:
+            pool = obtener_pool(procesos)
+            futuros.update({pool.submit(convertir_archivo, origen, destinos[origen]): origen for origen in comunes})
+        else:
+            hilo = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            futuros.update({hilo.submit(convertir_archivo, origen, destinos[origen]): origen for origen in comunes})
+        if office:
+            hilo = hilo or concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            backend = backend or obtener_backend_office()
+            futuros.update({hilo.submit(convertir_office, origen, destinos[origen], backend): origen for origen in office})
+
+        pendientes = set(futuros)
+        while pendientes:
+            if cancelar is not None and cancelar.is_set():
+                # Los que ya corren en el pool no se pueden detener: su PDF se borra cuando terminan
+                for futuro in pendientes:
+                    futuro.cancel()
+                    futuro.add_done_callback(functools.partial(borrar_destino, destinos[futuros[futuro]]))
+                raise AnalisisCancelado()
+            hechos, pendientes = concurrent.futures.wait(pendientes, timeout=0.1, return_when=concurrent.futures.FIRST_COMPLETED)
+            for futuro in hechos:
+                error = futuro.exception()
+                terminar(futuros[futuro], str(error) if error else None)
+    finally:
+        if hilo is not None:
+            hilo.shutdown(wait=False, cancel_futures=True)
+
+    return {origen: resultados[origen] for origen in archivos}
+
+
+EXTENSIONES_CONVERTIBLES = sorted(set(CONVERSORES) | EXTENSIONES_OFFICE)
+
+# Ventana de conversión: elige varios archivos y una carpeta de salida, los convierte en
+# segundo plano mostrando el estado de cada uno y pasa los PDF obtenidos a al_terminar(rutas).
+def convertir_a_pdf(root, al_terminar=None):
+    patrones = " ".join(f"*{extension}" for extension in EXTENSIONES_CONVERTIBLES)
+    archivos = filedialog.askopenfilenames(filetypes=[("Archivos convertibles", patrones), ("Todos los archivos", "*.*")])
+    if not archivos:
+        return
+    carpeta_salida = filedialog.askdirectory(title="Carpeta donde guardar los PDF")
+    if not carpeta_salida:
+        return
+
+    cola = queue.Queue()
+    cancelar = threading.Event()
+
+    ventana = Toplevel(root)
+    ventana.title("Convirtiendo a PDF")
+    ventana.geometry("500x360")
+    ventana.grab_set()
+
+    lista_archivos = ttk.Treeview(ventana, columns=("estado",), height=8)
+    lista_archivos.heading("#0", text="Archivo")
+    lista_archivos.heading("estado", text="Estado")
+    lista_archivos.column("estado", width=160, stretch=False)
+    lista_archivos.pack(fill="x", padx=10, pady=(10, 0))
+    filas_archivos = {
+        origen: lista_archivos.insert("", "end", text=os.path.basename(origen), values=("Pendiente",))
+        for origen in archivos
+    }
 
-def convertir_a_pdf():
-    archivo = filedialog.askopenfilename(filetypes=[("Todos los archivos", "*.*")])
-    if archivo:
-        pdf_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("Archivo PDF", "*.pdf")])
-        if pdf_path:
+    barra = ttk.Progressbar(ventana, length=300, mode='determinate', maximum=len(archivos))
+    barra.pack(pady=20)
+    label_progreso = ttk.Label(ventana, text=f"Convirtiendo {len(archivos)} archivos...")
+    label_progreso.pack()
+
+    def cancelar_trabajo():
+        cancelar.set()
+        label_progreso.config(text="Cancelando...")
+        btn_cancelar.config(state="disabled")
+
+    btn_cancelar = ttk.Button(ventana, text="Cancelar", command=cancelar_trabajo, bootstyle="danger")
+    btn_cancelar.pack(pady=10)
+    ventana.protocol("WM_DELETE_WINDOW", cancelar_trabajo)
+
+    def trabajo():
+        try:
+            resultados = convertir_archivos(
+                archivos, carpeta_salida, cancelar=cancelar,
+                progreso=lambda origen, destino, error: cola.put(("archivo", origen, error)),
+            )
+            cola.put(("fin", resultados))
+        except AnalisisCancelado:
+            cola.put(("cancelado",))
+        except Exception as e:
+            cola.put(("error", e))
+
+    def revisar_cola():
+        try:
+            while True:
+                mensaje = cola.get_nowait()
+                if mensaje[0] == "archivo":
+                    _, origen, error = mensaje
+                    fila = filas_archivos[origen]
+                    lista_archivos.set(fila, "estado", f"Error: {error}" if error else "Convertido")
+                    lista_archivos.see(fila)
+                    barra['value'] += 1
+                    continue
+
+                ventana.destroy()
+                if mensaje[0] == "fin":
+                    convertidos = [destino for destino, _ in mensaje[1].values() if destino]
+                    errores = [f"{os.path.basename(origen)}: {error}" for origen, (_, error) in mensaje[1].items() if error]
+                    if errores:
+                        messagebox.showwarning("Conversión", f"Se convirtieron {len(convertidos)} de {len(archivos)} archivos.\n\n" + "\n".join(errores))
+                    if convertidos and al_terminar:
+                        al_terminar(convertidos)
+                elif mensaje[0] == "error":
+                    messagebox.showerror("Error", f"No se pudieron convertir los archivos a PDF: {mensaje[1]}")
+                return
+        except queue.Empty:
+            pass
+        root.after(50, revisar_cola)
+
+    threading.Thread(target=trabajo, daemon=True).start()
+    root.after(50, revisar_cola)
+
+
+# Carpetas (sus PDFs), patrones glob y rutas sueltas -> lista ordenada de PDFs sin repetidos
+def expandir_entradas(entradas):
+    ruta_pdfs = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            encontrados = [os.path.join(entrada, nombre) for nombre in os.listdir(entrada)]
+        elif glob.has_magic(entrada):
+            encontrados = glob.glob(entrada, recursive=True)
+        else:
+            encontrados = [entrada]
+        ruta_pdfs.extend(sorted(ruta for ruta in encontrados if ruta.lower().endswith(".pdf") or ruta == entrada))
+    return list(dict.fromkeys(ruta_pdfs))
+
+
+# muestreos: {ruta: estimación} de los archivos cuyo color se estimó por muestreo
+def escribir_cotizacion(salida, formato, opciones, total_costo, detalles_archivos, precio_anillado, desglose_paginas, conteo_metodos, muestreos=None):
+    if formato == "csv":
+        escritor = csv.writer(salida)
+        escritor.writerow(["archivo", "paginas", "costo", "estimado"])
+        for ruta, (hojas, costo) in detalles_archivos.items():
+            escritor.writerow([ruta, hojas, costo, "si" if muestreos and muestreos.get(ruta) else "no"])
+        if precio_anillado is not None:
+            escritor.writerow(["ANILLADO", "", precio_anillado])
+        escritor.writerow(["TOTAL", sum(hojas for hojas, _ in detalles_archivos.values()), total_costo])
+    else:
+        archivos = []
+        for ruta, (hojas, costo) in detalles_archivos.items():
+            archivo = {"archivo": ruta, "paginas": hojas, "costo": costo}
+            if ruta in desglose_paginas:
+                paginas, bandas, precios, pesos = desglose_paginas[ruta]
+                if len(paginas) < hojas:
+                    # Estimado por muestreo: bandas y precios son de las páginas de la muestra
+                    archivo["paginas_muestra"] = paginas.tolist()
+                    archivo["pesos_muestra"] = pesos.tolist()
+                archivo["bandas_color"] = bandas.tolist()
+                archivo["precios_paginas"] = precios.tolist()
+            if muestreos and muestreos.get(ruta):
+                archivo["muestreo"] = muestreos[ruta]
+            archivos.append(archivo)
+        json.dump({
+            "opciones": opciones,
+            "archivos": archivos,
+            "anillado": precio_anillado,
+            "total": total_costo,
+            "paginas_por_metodo": conteo_metodos,
+        }, salida, ensure_ascii=False, indent=2)
+        salida.write("\n")
+
+
+# Tiempos por etapa de cada archivo (y de la ventana, si se pasan) en JSON, para analizarlos
+# fuera del programa. Los segundos de las páginas analizadas en el pool suman todos los procesos.
+def escribir_tiempos(ruta, analisis_archivos, etapas_generales=None):
+    def etapas_json(etapas):
+        return {etapa: {"segundos": round(segundos, 6), "veces": veces} for etapa, (segundos, veces) in (etapas or {}).items()}
+
+    escribir_json_atomico(ruta, {
+        "procesos": num_procesos,
+        "archivos": [
+            {
+                "archivo": analisis.ruta,
+                "paginas": analisis.num_paginas,
+                "dpi": analisis.dpi,
+                "sensibilidad": analisis.sensibilidad,
+                "paginas_por_metodo": analisis.metodos,
+                "etapas": etapas_json(analisis.etapas),
+            }
+            for analisis in analisis_archivos
+        ],
+        "general": etapas_json(etapas_generales),
+    })
+
+
+# Vigila una carpeta de entrada y mantiene al día un libro de cotizaciones (JSON) con un
+# presupuesto por PDF. Un archivo se cotiza recién cuando su fecha de modificación y su tamaño
+# no cambiaron entre dos revisiones seguidas, así no se leen archivos que se están copiando.
+def vigilar_carpeta(carpeta, ruta_libro, doble_faz=False, usuario="publico", color=False, anillado=False,
+                    intervalo=2.0, procesos=None, detener=None, avisar=print):
+    if detener is None:
+        detener = threading.Event()
+    opciones = {"doble_faz": doble_faz, "usuario": usuario, "color": color, "anillado": anillado}
+
+    archivos = {}
+    if os.path.exists(ruta_libro):
+        with open(ruta_libro, encoding="utf-8") as f:
+            libro = json.load(f)
+        if libro.get("opciones") == opciones:
+            archivos = libro.get("archivos", {})
+
+    vistos = {}
+    while not detener.is_set():
+        actuales = {}
+        for nombre in os.listdir(carpeta):
+            ruta_pdf = os.path.join(carpeta, nombre)
+            if nombre.lower().endswith(".pdf") and os.path.isfile(ruta_pdf):
+                estado = os.stat(ruta_pdf)
+                actuales[ruta_pdf] = [estado.st_mtime_ns, estado.st_size]
+
+        cambios = False
+        for ruta_pdf in list(archivos):
+            if ruta_pdf not in actuales:
+                del archivos[ruta_pdf]
+                cambios = True
+
+        for ruta_pdf, firma in actuales.items():
+            if vistos.get(ruta_pdf) != firma or archivos.get(ruta_pdf, {}).get("firma") == firma:
+                continue
+            entrada = {"firma": firma, "cotizado": time.strftime("%Y-%m-%d %H:%M:%S")}
             try:
-                extension = os.path.splitext(archivo)[1].lower()
-                temp_dir = tempfile.mkdtemp()
-                if extension in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
-                    imagen = Image.open(archivo)
-                    imagen.convert("RGB").save(pdf_path)
-                elif extension in ['.txt']:
-                    with open(archivo, 'r', encoding='utf-8') as f:
-                        contenido = f.read()
-                    doc = fitz.open()
-                    pagina = doc.new_page()
-                    pagina.insert_text((72, 72), contenido, fontsize=12)
-                    doc.save(pdf_path)
-                elif extension in ['.pdf']:
-                    shutil.copyfile(archivo, pdf_path)
-                elif extension in ['.doc', '.docx']:
-                    temp_pdf = os.path.join(temp_dir, "temp.pdf")
-                    convert_docx(archivo, temp_pdf)
-                    shutil.copyfile(temp_pdf, pdf_path)
-                else:
-                    messagebox.showwarning("Advertencia", "Tipo de archivo no soportado para conversión.")
-                    shutil.rmtree(temp_dir)
-                    return
-                messagebox.showinfo("Éxito", f"El archivzo {os.path.basename(archivo)} se ha convertido a PDF.")
-                shutil.rmtree(temp_dir)
+                analisis_archivos, _ = analizar_pdfs([ruta_pdf], procesos, cancelar=detener, solo_paginas=not color)
+                total_costo, detalles_archivos, precio_anillado, _ = cotizar(
+                    [analisis_archivos[ruta_pdf]], doble_faz, usuario, color, anillado
+                )
+                entrada.update(paginas=detalles_archivos[ruta_pdf][0], anillado=precio_anillado, total=total_costo)
+                avisar(f"{os.path.basename(ruta_pdf)}: {entrada['paginas']} páginas, ${total_costo}")
+            except AnalisisCancelado:
+                break
             except Exception as e:
-                messagebox.showerror("Error", f"No se pudo convertir el archivo a PDF: {e}")
+                # Se reintenta cuando el archivo cambie
+                entrada["error"] = str(e)
+                avisar(f"{os.path.basename(ruta_pdf)}: error {e}")
+            archivos[ruta_pdf] = entrada
+            cambios = True
+
+        if cambios:
+            escribir_json_atomico(ruta_libro, {"opciones": opciones, "archivos": archivos})
+        vistos = actuales
+        detener.wait(intervalo)
+
+
+# Cotización por línea de comandos, sin abrir ninguna ventana. Ejemplos:
+#   lector.py entrada/*.pdf --doble-faz --estudiante --formato csv -o presupuesto.csv
+#   lector.py --vigilar entrada --libro cotizaciones.json
+def main_cli(argumentos):
+    global sensitivity, dpi_color, muestreo_desde, muestreo_paginas, analisis_por_franjas, memoria_max_mb
+    parser = argparse.ArgumentParser(prog="lector", description="Cotiza fotocopias de PDFs sin abrir la ventana.")
+    parser.add_argument("entradas", nargs="*", help="PDFs, carpetas con PDFs o patrones glob (ej. 'cursos/**/*.pdf')")
+    parser.add_argument("--doble-faz", action="store_true", help="Copias doble faz")
+    parser.add_argument("--estudiante", action="store_true", help="Precios de estudiante (por defecto, público)")
+    parser.add_argument("--color", action="store_true", help="Copias a color")
+    parser.add_argument("--anillado", action="store_true", help="Sumar el anillado")
+    parser.add_argument("--formato", choices=["json", "csv"], default="json")
+    parser.add_argument("-o", "--salida", help="Archivo de salida (por defecto, la salida estándar)")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos para el análisis de color")
+    parser.add_argument("--sensibilidad", type=int, default=sensitivity, help="Umbral de sensibilidad (0-255)")
+    parser.add_argument("--dpi", type=int, default=dpi_color, help="Resolución del análisis de color")
+    parser.add_argument("--muestreo", type=int, default=muestreo_desde, metavar="PAGINAS",
+                        help="Estimar el color por muestreo en PDFs de al menos PAGINAS páginas (0 = nunca)")
+    parser.add_argument("--muestra", type=int, default=muestreo_paginas, help="Páginas de la muestra (--muestreo)")
+    parser.add_argument("--franjas", action="store_true", help="Analizar por franjas y cortar al conocer la banda de color")
+    parser.add_argument("--memoria-max", type=int, default=memoria_max_mb, metavar="MB",
+                        help="Techo de memoria de cada proceso del análisis (0 = sin techo)")
+    parser.add_argument("--sin-cache", action="store_true", help="No leer ni escribir la caché de color")
+    parser.add_argument("--tiempos", metavar="ARCHIVO", help="Medir el análisis por etapa y guardar los tiempos en un JSON")
+    parser.add_argument("--vigilar", metavar="CARPETA", help="Cotizar cada PDF que aparezca o cambie en la carpeta")
+    parser.add_argument("--libro", help="Libro de cotizaciones del modo --vigilar (por defecto CARPETA/cotizaciones.json)")
+    parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos entre revisiones de la carpeta")
+    args = parser.parse_args(argumentos)
+
+    sensitivity = args.sensibilidad
+    dpi_color = args.dpi
+    muestreo_desde = args.muestreo
+    muestreo_paginas = args.muestra
+    analisis_por_franjas = analisis_por_franjas or args.franjas
+    memoria_max_mb = args.memoria_max
+    usuario = "estudiante" if args.estudiante else "publico"
+
+    if args.vigilar:
+        if not os.path.isdir(args.vigilar):
+            parser.error(f"no existe la carpeta {args.vigilar}")
+        ruta_libro = args.libro or os.path.join(args.vigilar, "cotizaciones.json")
+        try:
+            vigilar_carpeta(args.vigilar, ruta_libro, args.doble_faz, usuario, args.color, args.anillado,
+                            args.intervalo, args.procesos)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    ruta_pdfs = expandir_entradas(args.entradas)
+    if not ruta_pdfs:
+        parser.error("no se encontró ningún PDF")
+
+    try:
+        analisis_archivos, conteo_metodos = analizar_pdfs(ruta_pdfs, args.procesos, usar_cache=not args.sin_cache, medir=bool(args.tiempos),
+                                                          solo_paginas=not args.color)
+        cronometro = Cronometro()
+        total_costo, detalles_archivos, precio_anillado, desglose_paginas = cotizar(
+            list(analisis_archivos.values()), args.doble_faz, usuario, args.color, args.anillado
+        )
+        cronometro.marcar("precios")
+        if args.tiempos:
+            escribir_tiempos(args.tiempos, analisis_archivos.values(), cronometro.etapas)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    opciones = {"doble_faz": args.doble_faz, "usuario": usuario, "color": args.color, "anillado": args.anillado}
+    # El muestreo sólo hace estimado el precio de las copias a color
+    muestreos = {ruta: analisis.muestreo for ruta, analisis in analisis_archivos.items() if analisis.muestreo} if args.color else None
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8", newline="") as salida:
+            escribir_cotizacion(salida, args.formato, opciones, total_costo, detalles_archivos, precio_anillado, desglose_paginas, conteo_metodos, muestreos)
+    else:
+        escribir_cotizacion(sys.stdout, args.formato, opciones, total_costo, detalles_archivos, precio_anillado, desglose_paginas, conteo_metodos, muestreos)
+    return 0
 
 
 def menu_interactivo():
     def salir():
         root.destroy()
 
+    # Archivos seleccionados, en orden. Cada uno guarda su análisis y la firma (fecha de
+    # modificación y tamaño) del archivo analizado, para no volver a analizarlo mientras no cambie.
+    seleccion = []
+
+    def firma_archivo(ruta_pdf):
+        try:
+            estado = os.stat(ruta_pdf)
+        except OSError:
+            return None
+        return estado.st_mtime_ns, estado.st_size
+
+    # Para blanco y negro alcanza con haber contado las páginas; el color se analiza recién
+    # cuando se pide una cotización a color
+    def entrada_vigente(entrada):
+        color = opcion_color.get() == 1
+        return (entrada["analisis"] is not None and entrada["analisis"].vigente(color)
+                and entrada["firma"] == firma_archivo(entrada["ruta"]))
+
+    def refrescar_lista():
+        lista_seleccion.delete(*lista_seleccion.get_children())
+        for entrada in seleccion:
+            if entrada_vigente(entrada):
+                analisis = entrada["analisis"]
+                valores = (analisis.num_paginas, "Analizado" if analisis.con_color else "Páginas contadas")
+            else:
+                valores = ("", "Pendiente")
+            lista_seleccion.insert("", "end", iid=entrada["ruta"], text=os.path.basename(entrada["ruta"]), values=valores)
+
+    def agregar_archivos(rutas_pdfs):
+        seleccionadas = {entrada["ruta"] for entrada in seleccion}
+        for ruta_pdf in rutas_pdfs:
+            if ruta_pdf not in seleccionadas:
+                seleccion.append({"ruta": ruta_pdf, "firma": None, "analisis": None})
+                seleccionadas.add(ruta_pdf)
+        refrescar_lista()
+        recotizar()
+
     def seleccionar_archivos():
         rutas_pdfs = filedialog.askopenfilenames(filetypes=[("Archivos PDF", "*.pdf")])
         if rutas_pdfs:
-            rutas_var.set(", ".join(rutas_pdfs))
+            agregar_archivos(rutas_pdfs)
+
+    # Los PDF convertidos se suman a la selección, listos para cotizar
+    def convertir_archivos_a_pdf():
+        convertir_a_pdf(root, al_terminar=agregar_archivos)
+
+    def quitar_archivos():
+        quitar = set(lista_seleccion.selection())
+        if not quitar:
+            return
+        seleccion[:] = [entrada for entrada in seleccion if entrada["ruta"] not in quitar]
+        refrescar_lista()
+        recotizar()
 
 
     def mostrar_ventana_manual():
@@ -275,7 +2086,7 @@ def menu_interactivo():
                     # Si la opción "Doble Faz" está marcada, dividimos la cantidad por 2 y sumamos 1 si la cantidad es impar
                     cantidad = (cantidad + 1) // 2
 
-                precio_por_copia = obtener_precio(cantidad, tipo, usuario, 0, color)  # Porcentaje de color es 0
+                precio_por_copia = obtener_precio(cantidad, tipo, usuario)
                 total_costo = precio_por_copia * cantidad
 
                 messagebox.showinfo("Resultado", f"El costo total es: ${total_costo}")
@@ -300,86 +2111,308 @@ def menu_interactivo():
         messagebox.showwarning("ADVERTENCIA","NO ANDA ESTO NO PUEDO ARREGLAR AAAAAAAAAAA")
 
 
-    def mostrar_ventana_detalles(total_copias, detalles_archivos, opciones_seleccionadas):
+    # Texto de sólo lectura con barra de desplazamiento, para los textos que pueden ser largos
+    def texto_solo_lectura(padre, contenido, alto):
+        marco = ttk.Frame(padre)
+        texto = Text(marco, height=alto, wrap="word")
+        scrollbar = ttk.Scrollbar(marco, orient="vertical", command=texto.yview)
+        texto.configure(yscrollcommand=scrollbar.set)
+        texto.insert("end", contenido)
+        texto.configure(state="disabled")
+        texto.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        return marco
+
+    # Los archivos van en un Treeview, que sólo dibuja las filas visibles. Las filas se insertan
+    # de a FILAS_POR_TANDA con after, así la ventana se abre y responde aunque haya miles de
+    # archivos. Un clic en el encabezado ordena por esa columna (otro clic invierte el orden).
+    # fracciones_color: {ruta: fracción de color promedio del archivo}, si se analizó el color.
+    # tiempos es (analisis_archivos, cronómetro del trabajo) cuando se miden las etapas
+    def mostrar_ventana_detalles(total_copias, detalles_archivos, opciones_seleccionadas, tiempos=None, fracciones_color=None):
+        fracciones_color = fracciones_color or {}
         detalles_window = Toplevel(root)
         detalles_window.title("Detalles de Archivos")
-        detalles_window.geometry("600x400")
-
-        canvas = ttk.Canvas(detalles_window)
-        scrollbar = ttk.Scrollbar(detalles_window, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(
-                scrollregion=canvas.bbox("all")
-            )
-        )
-
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        detalles_window.geometry("760x600")
+
+        ttk.Label(detalles_window, text="Opciones seleccionadas:", font=("Arial", 12, "bold")).pack(anchor="w", padx=10, pady=(10, 0))
+        texto_solo_lectura(detalles_window, opciones_seleccionadas.rstrip("\n"), 6).pack(fill="x", padx=10, pady=5)
+        ttk.Label(detalles_window, text=f"Costo total de las fotocopias: ${total_copias}", font=("Arial", 12, "bold")).pack(anchor="w", padx=10, pady=5)
+
+        # (nombre, hojas, precio, precio por copia, fracción de color o None) de cada archivo
+        filas = [
+            (os.path.basename(ruta), hojas, precio, precio // hojas if hojas > 0 else 0, fracciones_color.get(ruta))
+            for ruta, (hojas, precio) in detalles_archivos.items()
+        ]
+        columnas = {"archivo": "Archivo", "hojas": "Hojas", "precio": "Precio", "por_copia": "Por copia", "color": "Color"}
+        claves = {
+            "archivo": lambda fila: fila[0].lower(),
+            "hojas": lambda fila: fila[1],
+            "precio": lambda fila: fila[2],
+            "por_copia": lambda fila: fila[3],
+            "color": lambda fila: -1.0 if fila[4] is None else fila[4],
+        }
 
-        ttk.Label(scrollable_frame, text="Opciones seleccionadas:", font=("Arial", 12, "bold")).grid(row=0, column=0, columnspan=2, padx=5, pady=5)
-        ttk.Label(scrollable_frame, text=opciones_seleccionadas).grid(row=1, column=0, columnspan=2, padx=5, pady=5)
+        marco_tabla = ttk.Frame(detalles_window)
+        marco_tabla.pack(fill="both", expand=True, padx=10, pady=5)
+        tabla = ttk.Treeview(marco_tabla, columns=tuple(columnas), show="headings")
+        tabla.column("archivo", width=300, anchor="w")
+        for columna in ("hojas", "precio", "por_copia", "color"):
+            tabla.column(columna, width=90, anchor="e", stretch=False)
+        scrollbar = ttk.Scrollbar(marco_tabla, orient="vertical", command=tabla.yview)
+        tabla.configure(yscrollcommand=scrollbar.set)
+        tabla.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
 
-        ttk.Label(scrollable_frame, text=f"Costo total de las fotocopias: ${total_copias}", font=("Arial", 12, "bold")).grid(row=2, column=0, columnspan=2, padx=5, pady=5)
+        orden = {"columna": None, "descendente": False}
+        carga = {"tarea": None}
+
+        def cargar(desde=0):
+            # Se programa en root: si la ventana ya se cerró, la tanda pendiente no hace nada
+            if not detalles_window.winfo_exists():
+                return
+            hasta = desde + FILAS_POR_TANDA
+            for nombre, hojas, precio, por_copia, fraccion in filas[desde:hasta]:
+                tabla.insert("", "end", values=(nombre, hojas, f"${precio}", f"${por_copia}", "-" if fraccion is None else f"{fraccion:.1%}"))
+            carga["tarea"] = root.after(1, cargar, hasta) if hasta < len(filas) else None
+
+        def ordenar(columna):
+            descendente = orden["columna"] == columna and not orden["descendente"]
+            orden.update(columna=columna, descendente=descendente)
+            filas.sort(key=claves[columna], reverse=descendente)
+            for nombre, titulo in columnas.items():
+                flecha = (" ▼" if descendente else " ▲") if nombre == columna else ""
+                tabla.heading(nombre, text=titulo + flecha)
+            if carga["tarea"] is not None:
+                root.after_cancel(carga["tarea"])
+            tabla.delete(*tabla.get_children())
+            cargar()
+
+        for nombre, titulo in columnas.items():
+            tabla.heading(nombre, text=titulo, command=lambda nombre=nombre: ordenar(nombre))
+        cargar()
+
+        if tiempos is not None:
+            analisis_archivos, cronometro_trabajo = tiempos
+            lineas = []
+            for analisis in analisis_archivos:
+                if analisis.etapas:
+                    texto = Cronometro(analisis.etapas).texto()
+                else:
+                    texto = "sin medir (analizado antes de activar la medición)"
+                lineas.append(f"{os.path.basename(analisis.ruta)}: {texto}")
+            if cronometro_trabajo is not None:
+                lineas.append(f"Ventana y precios: {cronometro_trabajo.texto()}")
+            ttk.Label(detalles_window, text="Tiempos por etapa:", font=("Arial", 12, "bold")).pack(anchor="w", padx=10, pady=(5, 0))
+            texto_solo_lectura(detalles_window, "\n".join(lineas), 4).pack(fill="x", padx=10, pady=5)
+
+            def exportar_tiempos():
+                ruta = filedialog.asksaveasfilename(defaultextension=".json", initialfile="tiempos.json", filetypes=[("JSON", "*.json")])
+                if not ruta:
+                    return
+                try:
+                    etapas_generales = cronometro_trabajo.etapas if cronometro_trabajo is not None else None
+                    escribir_tiempos(ruta, analisis_archivos, etapas_generales)
+                    messagebox.showinfo("Éxito", f"Tiempos exportados a {os.path.basename(ruta)}")
+                except Exception as e:
+                    messagebox.showerror("Error", f"No se pudieron exportar los tiempos: {e}")
 
-        row = 3
-        for ruta, (hojas, precio) in detalles_archivos.items():
-            precio_por_copia = precio // hojas if hojas > 0 else 0
-            ttk.Label(scrollable_frame, text=f"Archivo: {os.path.basename(ruta)}", font=("Arial", 12, "bold")).grid(row=row, column=0, padx=5, pady=5, sticky="w")
-            row += 1
-            ttk.Label(scrollable_frame, text=f"Hojas: {hojas}").grid(row=row, column=0, padx=5, pady=5, sticky="w")
-            ttk.Label(scrollable_frame, text=f"Precio: ${precio} (${precio_por_copia} por copia)").grid(row=row, column=1, padx=5, pady=5, sticky="w")
-            row += 1
+            ttk.Button(detalles_window, text="Exportar tiempos (JSON)", command=exportar_tiempos, bootstyle="secondary").pack(anchor="w", padx=10, pady=5)
 
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        return detalles_window
 
     
-    def calcular():
-        rutas_pdfs = rutas_var.get().split(", ")
-        if rutas_pdfs:
-            doble_faz = opcion_doble_faz.get() == 1
-            usuario = "estudiante" if opcion_usuario.get() == 1 else "publico"
-            color = opcion_color.get() == 1
-            total_copias, detalles_archivos = calcular_precios(root, rutas_pdfs, doble_faz, usuario, color)
-            if total_copias is not None:
-                opciones_seleccionadas = (
-                    f"Tipo de usuario: {'Estudiante' if usuario == 'estudiante' else 'Público'}\n"
-                    f"Tipo de fotocopia: {'Doble faz' if doble_faz else 'Simple'}\n"
-                    f"Color: {'Sí' if color else 'No'}\n"
+    ventana_detalles = None
+    cronometro_trabajo = None  # Tiempos de la ventana del último cálculo, si se miden las etapas
+
+    def opciones_actuales():
+        doble_faz = opcion_doble_faz.get() == 1
+        usuario = "estudiante" if opcion_usuario.get() == 1 else "publico"
+        color = opcion_color.get() == 1
+        anillado = opcion_anillado.get() == 1
+        return doble_faz, usuario, color, anillado
+
+    def texto_opciones(doble_faz, usuario, color, anillado, precio_anillado, desglose_paginas, conteo_metodos, analisis_archivos):
+        opciones_seleccionadas = (
+            f"Tipo de usuario: {'Estudiante' if usuario == 'estudiante' else 'Público'}\n"
+            f"Tipo de fotocopia: {'Doble faz' if doble_faz else 'Simple'}\n"
+            f"Color: {'Sí' if color else 'No'}\n"
+        )
+
+        # Verificar si se seleccionó la opción de anillado
+        if anillado:
+            opciones_seleccionadas += f"Anillado: Sí, ${precio_anillado}\n"
+        else:
+            opciones_seleccionadas += "Anillado: No\n"
+
+        # Cuántas páginas cayeron en cada banda de color (en los archivos muestreados, estimadas)
+        muestreados = [analisis for analisis in analisis_archivos if analisis.muestreo] if color else []
+        if desglose_paginas:
+            bandas = np.concatenate([bandas for _, bandas, _, _ in desglose_paginas.values()])
+            pesos = np.concatenate([pesos for _, _, _, pesos in desglose_paginas.values()])
+            cantidades = np.bincount(bandas + 1, weights=pesos)
+            for banda, cantidad in enumerate(cantidades, start=-1):
+                if cantidad:
+                    nombre = tabla_precios.nombre_banda(banda) if banda >= 0 else "sin recargo"
+                    opciones_seleccionadas += f"Páginas con color {nombre}: {'~' if muestreados else ''}{round(cantidad)}\n"
+
+        if not color:
+            opciones_seleccionadas += "Blanco y negro: sólo se contaron las páginas, sin analizar el color\n"
+            return opciones_seleccionadas
+
+        # Cotización exacta o estimada por muestreo
+        if muestreados:
+            opciones_seleccionadas += "Cotización estimada por muestreo:\n"
+            for analisis in muestreados:
+                estimacion = analisis.muestreo
+                opciones_seleccionadas += (
+                    f"  {os.path.basename(analisis.ruta)}: {len(analisis.paginas)} de {analisis.num_paginas} páginas, "
+                    f"color promedio {estimacion['promedio']:.1%} (IC 95%: {estimacion['minimo']:.1%} a {estimacion['maximo']:.1%}), "
+                    f"recargo por página ${estimacion['recargo']:.2f} (IC 95%: ${estimacion['recargo_minimo']:.2f} a ${estimacion['recargo_maximo']:.2f})\n"
                 )
+        else:
+            opciones_seleccionadas += "Cotización exacta (todas las páginas analizadas)\n"
 
-                # Verificar si se seleccionó la opción de anillado
-                if opcion_anillado.get() == 1:
-                    total_hojas = sum(hojas for hojas, _ in detalles_archivos.values())
-                    precio_anillado = obtener_precio_anillado(total_hojas, usuario, color)
-                    total_copias += precio_anillado
-                    opciones_seleccionadas += f"Anillado: Sí, ${precio_anillado}\n"
-                else:
-                    opciones_seleccionadas += "Anillado: No\n"
+        opciones_seleccionadas += (
+            f"Páginas sin renderizar (vectoriales en gris): {conteo_metodos['vectorial']}\n"
+            f"Páginas renderizadas: {conteo_metodos['raster']}\n"
+            f"Páginas renderizadas en parte (banda ya definida): {conteo_metodos['franjas']}\n"
+            f"Páginas desde la caché: {conteo_metodos['cache']}\n"
+        )
+        return opciones_seleccionadas
+
+    # Cotiza con las opciones actuales a partir de los análisis de la selección, sin volver a abrir
+    # los PDFs. Devuelve False si falta analizar algún archivo.
+    def recotizar(mostrar=False):
+        nonlocal ventana_detalles
+        if not seleccion or not all(entrada_vigente(entrada) for entrada in seleccion):
+            # Con color, los archivos de los que sólo se contaron las páginas esperan a "Calcular"
+            falta_color = opcion_color.get() == 1 and any(entrada["analisis"] is not None for entrada in seleccion)
+            label_total.config(text="Falta analizar el color: presiona Calcular" if falta_color else "")
+            return False
+        analisis_archivos = [entrada["analisis"] for entrada in seleccion]
+        conteo_metodos = {"cache": 0, "vectorial": 0, "raster": 0, "franjas": 0}
+        for analisis in analisis_archivos:
+            for metodo, paginas in analisis.metodos.items():
+                conteo_metodos[metodo] += paginas
+        doble_faz, usuario, color, anillado = opciones_actuales()
+        if cronometro_trabajo is not None:
+            cronometro_trabajo.reiniciar()
+        try:
+            total_copias, detalles_archivos, precio_anillado, desglose_paginas = cotizar(analisis_archivos, doble_faz, usuario, color, anillado)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo calcular el precio: {e}")
+            return True
+        label_total.config(text=f"Total: ${total_copias}")
+        if cronometro_trabajo is not None:
+            cronometro_trabajo.marcar("precios")
+
+        # La ventana de detalles abierta se reemplaza por una con los precios nuevos
+        abierta = ventana_detalles is not None and ventana_detalles.winfo_exists()
+        if mostrar or abierta:
+            if abierta:
+                ventana_detalles.destroy()
+            opciones_seleccionadas = texto_opciones(doble_faz, usuario, color, anillado, precio_anillado, desglose_paginas, conteo_metodos, analisis_archivos)
+            tiempos = (analisis_archivos, cronometro_trabajo) if medir_etapas else None
+            # Fracción de color promedio de cada archivo con el color analizado (en los muestreados, la estimada)
+            fracciones_color = {
+                analisis.ruta: float(np.dot(analisis.pesos, analisis.color)) / analisis.num_paginas
+                for analisis in analisis_archivos if analisis.con_color and analisis.num_paginas
+            }
+            ventana_detalles = mostrar_ventana_detalles(total_copias, detalles_archivos, opciones_seleccionadas, tiempos, fracciones_color)
+        return True
 
-                mostrar_ventana_detalles(total_copias, detalles_archivos, opciones_seleccionadas)
-        else:
+    # Al pasar a color, los archivos de los que sólo se contaron las páginas vuelven a "Pendiente"
+    def cambiar_color():
+        refrescar_lista()
+        recotizar()
+
+    def calcular():
+        nonlocal cronometro_trabajo
+        if not seleccion:
             messagebox.showwarning("Advertencia", "Por favor, selecciona al menos un archivo PDF.")
+            return
+
+        cronometro_trabajo = Cronometro() if medir_etapas else None
+
+        # Sólo se analizan los archivos nuevos o que cambiaron desde su último análisis
+        pendientes = [entrada for entrada in seleccion if not entrada_vigente(entrada)]
+        if not pendientes:
+            recotizar(mostrar=True)
+            return
+        listos = [entrada["ruta"] for entrada in seleccion if entrada_vigente(entrada)]
+        firmas = {entrada["ruta"]: firma_archivo(entrada["ruta"]) for entrada in pendientes}
+
+        def mostrar_resultado(analisis_archivos, conteo_metodos):
+            for entrada, analisis in zip(pendientes, analisis_archivos):
+                entrada["analisis"] = analisis
+                entrada["firma"] = firmas[entrada["ruta"]]
+            refrescar_lista()
+            recotizar(mostrar=True)
+
+        # Blanco y negro: sólo se cuentan las páginas, tan rápido que no hace falta ventana de progreso
+        if opcion_color.get() != 1:
+            rutas = [entrada["ruta"] for entrada in pendientes]
+            try:
+                analisis_archivos, conteo_metodos = analizar_pdfs(rutas, solo_paginas=True)
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo abrir el archivo PDF: {e}")
+                return
+            mostrar_resultado([analisis_archivos[ruta_pdf] for ruta_pdf in rutas], conteo_metodos)
+            return
+
+        calcular_precios(root, [entrada["ruta"] for entrada in pendientes], al_terminar=mostrar_resultado, listos=listos, cronometro=cronometro_trabajo)
 
     def mostrar_ventana_ajustes():
         def guardar_ajustes():
-            global sensitivity  # Declarar sensibilidad como global
+            global sensitivity, dpi_color, num_procesos, cache_max_mb, medir_etapas, muestreo_desde, muestreo_paginas, analisis_por_franjas, memoria_max_mb  # Declarar los ajustes como globales
             try:
                 nueva_sensibilidad = int(entry_sensitivity.get())
-                if 0 <= nueva_sensibilidad <= 255:
+                nuevo_dpi = int(entry_dpi.get())
+                nuevos_procesos = int(entry_procesos.get())
+                nuevo_cache_mb = int(entry_cache.get())
+                nuevo_muestreo = int(entry_muestreo.get())
+                nueva_muestra = int(entry_muestra.get())
+                nueva_memoria = int(entry_memoria.get())
+                if not 0 <= nueva_sensibilidad <= 255:
+                    messagebox.showerror("Error", "El umbral de sensibilidad debe estar entre 0 y 255.")
+                elif not 12 <= nuevo_dpi <= 300:
+                    messagebox.showerror("Error", "La resolución de análisis debe estar entre 12 y 300 DPI.")
+                elif not 1 <= nuevos_procesos <= 64:
+                    messagebox.showerror("Error", "La cantidad de procesos debe estar entre 1 y 64.")
+                elif nuevo_cache_mb < 1:
+                    messagebox.showerror("Error", "El tamaño de la caché debe ser de al menos 1 MB.")
+                elif nuevo_muestreo < 0 or nueva_muestra < 4:
+                    messagebox.showerror("Error", "El muestreo no puede ser negativo y la muestra debe tener al menos 4 páginas.")
+                elif nueva_memoria < 0:
+                    messagebox.showerror("Error", "El techo de memoria no puede ser negativo.")
+                else:
                     sensitivity = nueva_sensibilidad
+                    dpi_color = nuevo_dpi
+                    num_procesos = nuevos_procesos
+                    cache_max_mb = nuevo_cache_mb
+                    medir_etapas = opcion_medir.get() == 1
+                    analisis_por_franjas = opcion_franjas.get() == 1
+                    muestreo_desde = nuevo_muestreo
+                    muestreo_paginas = nueva_muestra
+                    memoria_max_mb = nueva_memoria
                     ajustes_window.destroy()
-                else:
-                    messagebox.showerror("Error", "El umbral de sensibilidad debe estar entre 0 y 255.")
+                    aplicar_sensibilidad()
+                    # Con otra resolución (o sin muestreo) los análisis hechos ya no sirven
+                    refrescar_lista()
+                    recotizar()
             except ValueError:
-                messagebox.showerror("Error", "El umbral de sensibilidad debe ser un número entero.")
+                messagebox.showerror("Error", "Los ajustes deben ser números enteros.")
+
+        def vaciar_cache_ajustes():
+            try:
+                vaciar_cache()
+                messagebox.showinfo("Éxito", "Caché de análisis de color vaciada")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo vaciar la caché: {e}")
 
         ajustes_window = Toplevel(root)
         ajustes_window.title("Ajustes Avanzados")
-        ajustes_window.geometry("300x200")
+        ajustes_window.geometry("420x900")
 
         label_sensitivity = ttk.Label(ajustes_window, text="Umbral de Sensibilidad para Detección de Color:", font=("Arial", 12))
         label_sensitivity.pack(pady=10)
@@ -388,9 +2421,133 @@ def menu_interactivo():
         entry_sensitivity.pack(pady=10)
         entry_sensitivity.insert(0, sensitivity)
 
+        label_dpi = ttk.Label(ajustes_window, text="Resolución de análisis de color (DPI):", font=("Arial", 12))
+        label_dpi.pack(pady=10)
+
+        entry_dpi = ttk.Entry(ajustes_window)
+        entry_dpi.pack(pady=10)
+        entry_dpi.insert(0, dpi_color)
+
+        label_procesos = ttk.Label(ajustes_window, text="Procesos para el análisis (1 = sin paralelismo):", font=("Arial", 12))
+        label_procesos.pack(pady=10)
+
+        entry_procesos = ttk.Entry(ajustes_window)
+        entry_procesos.pack(pady=10)
+        entry_procesos.insert(0, num_procesos)
+
+        label_cache = ttk.Label(ajustes_window, text="Tamaño máximo de la caché de color (MB):", font=("Arial", 12))
+        label_cache.pack(pady=10)
+
+        entry_cache = ttk.Entry(ajustes_window)
+        entry_cache.pack(pady=10)
+        entry_cache.insert(0, cache_max_mb)
+
+        label_muestreo = ttk.Label(ajustes_window, text="Muestrear el color en PDFs desde (páginas, 0 = nunca):", font=("Arial", 12))
+        label_muestreo.pack(pady=10)
+
+        entry_muestreo = ttk.Entry(ajustes_window)
+        entry_muestreo.pack(pady=10)
+        entry_muestreo.insert(0, muestreo_desde)
+
+        label_muestra = ttk.Label(ajustes_window, text="Páginas de la muestra:", font=("Arial", 12))
+        label_muestra.pack(pady=10)
+
+        entry_muestra = ttk.Entry(ajustes_window)
+        entry_muestra.pack(pady=10)
+        entry_muestra.insert(0, muestreo_paginas)
+
+        label_memoria = ttk.Label(ajustes_window, text="Techo de memoria por proceso (MB, 0 = sin techo):", font=("Arial", 12))
+        label_memoria.pack(pady=10)
+
+        entry_memoria = ttk.Entry(ajustes_window)
+        entry_memoria.pack(pady=10)
+        entry_memoria.insert(0, memoria_max_mb)
+
+        # Renderizar de a franjas y cortar apenas se sabe la banda de color de la página
+        opcion_franjas = IntVar(value=1 if analisis_por_franjas else 0)
+        chk_franjas = ttk.Checkbutton(ajustes_window, text="Analizar por franjas (corta al conocer la banda)", variable=opcion_franjas)
+        chk_franjas.pack(pady=10)
+
+        # Tiempos por etapa del análisis en la ventana de detalles (abrir, renderizar, umbral...)
+        opcion_medir = IntVar(value=1 if medir_etapas else 0)
+        chk_medir = ttk.Checkbutton(ajustes_window, text="Medir tiempos por etapa", variable=opcion_medir)
+        chk_medir.pack(pady=10)
+
+        btn_vaciar_cache = ttk.Button(ajustes_window, text="Vaciar caché", command=vaciar_cache_ajustes, bootstyle="warning")
+        btn_vaciar_cache.pack(pady=5)
+
         btn_guardar = ttk.Button(ajustes_window, text="Guardar", command=guardar_ajustes, bootstyle="success")
         btn_guardar.pack(pady=10)
 
+    # Con otra sensibilidad, los análisis con histogramas se recalculan sin abrir los PDFs;
+    # los demás quedan pendientes para el próximo "Calcular"
+    def aplicar_sensibilidad():
+        for entrada in seleccion:
+            analisis = entrada["analisis"]
+            if analisis is not None and analisis.con_color and analisis.sensibilidad != sensitivity and analisis.dpi == dpi_color:
+                entrada["analisis"] = analisis.con_sensibilidad(sensitivity) or analisis
+
+    # Recorre los umbrales de sensibilidad sobre el trabajo cargado y muestra, para cada uno, la
+    # fracción de color promedio y el total de la cotización a color, desde los histogramas
+    def mostrar_ventana_calibracion():
+        if not seleccion or not all(
+            entrada_vigente(entrada) and entrada["analisis"].vigente() and entrada["analisis"].histogramas is not None
+            for entrada in seleccion
+        ):
+            messagebox.showwarning(
+                "Advertencia",
+                "Primero calcula una cotización a color de la selección (sin el análisis por franjas, que no guarda histogramas).",
+            )
+            return
+        analisis_archivos = [entrada["analisis"] for entrada in seleccion]
+        doble_faz, usuario, _, anillado = opciones_actuales()
+        sensibilidades = sorted(set(range(0, 256, 5)) | {sensitivity})
+        try:
+            barrido = barrer_sensibilidad(analisis_archivos, sensibilidades, doble_faz, usuario, anillado)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo calibrar: {e}")
+            return
+
+        def usar_sensibilidad():
+            global sensitivity
+            elegida = tabla.selection()
+            if not elegida:
+                return
+            sensitivity = int(elegida[0])
+            calibracion_window.destroy()
+            aplicar_sensibilidad()
+            refrescar_lista()
+            recotizar()
+
+        calibracion_window = Toplevel(root)
+        calibracion_window.title("Calibrar Sensibilidad")
+        calibracion_window.geometry("420x560")
+
+        ttk.Label(
+            calibracion_window, wraplength=380, font=("Arial", 10),
+            text=f"Color y total a color del trabajo cargado para cada umbral de sensibilidad (actual: {sensitivity}).",
+        ).pack(pady=10)
+
+        marco_tabla = ttk.Frame(calibracion_window)
+        marco_tabla.pack(fill="both", expand=True, padx=10)
+        tabla = ttk.Treeview(marco_tabla, columns=("sensibilidad", "color", "total"), show="headings", selectmode="browse")
+        tabla.heading("sensibilidad", text="Sensibilidad")
+        tabla.heading("color", text="Color promedio")
+        tabla.heading("total", text="Total a color")
+        for columna in ("sensibilidad", "color", "total"):
+            tabla.column(columna, anchor="e", width=120)
+        scrollbar = ttk.Scrollbar(marco_tabla, orient="vertical", command=tabla.yview)
+        tabla.configure(yscrollcommand=scrollbar.set)
+        tabla.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        for sensibilidad, fraccion, total in barrido:
+            tabla.insert("", "end", iid=str(sensibilidad), values=(sensibilidad, f"{fraccion:.1%}", f"${total}"))
+        tabla.selection_set(str(sensitivity))
+        tabla.see(str(sensitivity))
+
+        btn_usar = ttk.Button(calibracion_window, text="Usar esta sensibilidad", command=usar_sensibilidad, bootstyle="success")
+        btn_usar.pack(pady=10)
+
     def mostrar_ventana_editar_precios():
         def guardar_precios_editar():
             try:
@@ -420,23 +2577,46 @@ def menu_interactivo():
                             precio = int(precio)
                             precios_actualizados_estudiante[tipo][cantidad] = precio
 
-                # Guardar los precios actualizados en el archivo Excel
-                guardar_precios(precios_actualizados_publico, precios_actualizados_estudiante)
-                
+                # Bandas de color: el umbral se carga en porcentaje de la página
+                precios_actualizados_color = {}
+                for entry_umbral, entry_recargo in entry_color:
+                    umbral = entry_umbral.get().strip()
+                    recargo = entry_recargo.get().strip()
+
+                    if umbral and recargo:
+                        umbral = float(umbral)
+                        if not 0 <= umbral <= 100:
+                            raise ValueError("umbral de color fuera de rango")
+                        precios_actualizados_color[umbral / 100] = int(recargo)
+
+                # Guardar los precios actualizados
+                if not guardar_precios(precios_actualizados_publico, precios_actualizados_estudiante, precios_actualizados_color):
+                    return
+
+                # Usar los precios nuevos desde el próximo cálculo, sin reiniciar el programa
+                actualizar_tabla_precios(precios_actualizados_publico, precios_actualizados_estudiante, precios_actualizados_color)
+                recotizar()
+
                 # Cerrar la ventana de edición después de guardar
                 editar_precios_window.destroy()
 
                 # Mostrar mensaje de éxito
                 messagebox.showinfo("Éxito", "Precios guardados con éxito")
-                # Mostrar mensaje de reiniciar el programa para que los cambios sean guardados con éxito
-                messagebox.showinfo("Advertencia", "Reinicie el programa para que los precios sean actualizados")
                 
             except ValueError:
-                messagebox.showerror("Error", "Todos los campos deben ser números enteros.")
+                messagebox.showerror("Error", "Todos los campos deben ser números enteros (los umbrales de color, porcentajes entre 0 y 100).")
             except Exception as e:
                 messagebox.showerror("Error", f"Ocurrió un error al guardar los precios: {e}")
 
 
+        def agregar_banda_color():
+            row = len(entry_color) + 2
+            entry_umbral = ttk.Entry(frame_color, width=10)
+            entry_umbral.grid(row=row, column=0, padx=5, pady=5, sticky="w")
+            entry_recargo = ttk.Entry(frame_color, width=10)
+            entry_recargo.grid(row=row, column=1, padx=5, pady=5, sticky="w")
+            entry_color.append((entry_umbral, entry_recargo))
+
         def agregar_nuevo_rango(tipo, es_publico=True):
             frame = frame_publico if es_publico else frame_estudiante
             entry_group = entry_publico if es_publico else entry_estudiante
@@ -450,11 +2630,14 @@ def menu_interactivo():
 
         editar_precios_window = Toplevel(root)
         editar_precios_window.title("Editar Precios")
-        editar_precios_window.geometry("800x600")
+        editar_precios_window.geometry("1000x600")
 
         frame_publico = ttk.Frame(editar_precios_window)
         frame_publico.pack(side="left", padx=20, pady=20, fill="y", expand=True)
 
+        frame_color = ttk.Frame(editar_precios_window)
+        frame_color.pack(side="left", padx=20, pady=20, fill="y", expand=True)
+
         frame_estudiante = ttk.Frame(editar_precios_window)
         frame_estudiante.pack(side="right", padx=20, pady=20, fill="y", expand=True)
 
@@ -491,16 +2674,55 @@ def menu_interactivo():
                 entry_estudiante[tipo].append((entry_cantidad, entry_precio))
                 row_estudiante += 1
 
+        # Recargo por página a color según el porcentaje de la página con color
+        ttk.Label(frame_color, text="Color", font=("Arial", 12, "bold")).grid(row=0, column=0, columnspan=2, pady=10)
+        ttk.Label(frame_color, text="Desde % color / Recargo", font=("Arial", 10, "bold")).grid(row=1, column=0, columnspan=2, pady=5)
+        entry_color = []
+        for umbral in sorted(precios_color):
+            agregar_banda_color()
+            entry_umbral, entry_recargo = entry_color[-1]
+            entry_umbral.insert(0, f"{umbral * 100:g}")
+            entry_recargo.insert(0, precios_color[umbral])
+        # El botón va en una fila alta para que las bandas nuevas se agreguen arriba de él
+        ttk.Button(frame_color, text="Agregar banda", command=agregar_banda_color).grid(row=100, column=0, columnspan=2, pady=10)
+
         # Botones para agregar nuevos rangos
         ttk.Button(frame_publico, text="Agregar rango", command=lambda: agregar_nuevo_rango("simple", es_publico=True)).grid(row=row_publico, column=0, columnspan=2, pady=10)
         ttk.Button(frame_estudiante, text="Agregar rango", command=lambda: agregar_nuevo_rango("simple", es_publico=False)).grid(row=row_estudiante, column=0, columnspan=2, pady=10)
 
+        def importar_excel():
+            ruta = filedialog.askopenfilename(filetypes=[("Libro de Excel", "*.xlsx")])
+            if not ruta:
+                return
+            try:
+                nuevos_publico, nuevos_estudiante = importar_precios_excel(ruta)
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudieron leer los precios de {os.path.basename(ruta)}: {e}")
+                return
+            if guardar_precios(nuevos_publico, nuevos_estudiante, precios_color):
+                actualizar_tabla_precios(nuevos_publico, nuevos_estudiante)
+                recotizar()
+                editar_precios_window.destroy()
+                messagebox.showinfo("Éxito", f"Precios importados de {os.path.basename(ruta)}")
+
+        def exportar_excel():
+            ruta = filedialog.asksaveasfilename(defaultextension=".xlsx", initialfile="precios.xlsx", filetypes=[("Libro de Excel", "*.xlsx")])
+            if not ruta:
+                return
+            try:
+                exportar_precios_excel(ruta, precios_publico, precios_estudiante)
+                messagebox.showinfo("Éxito", f"Precios exportados a {os.path.basename(ruta)}")
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudieron exportar los precios: {e}\nAsegúrate de que el archivo no esté abierto en Excel.")
+
         ttk.Button(editar_precios_window, text="Guardar", command=guardar_precios_editar, bootstyle="success").pack(pady=20)
+        ttk.Button(editar_precios_window, text="Importar Excel", command=importar_excel, bootstyle="secondary").pack(pady=5)
+        ttk.Button(editar_precios_window, text="Exportar Excel", command=exportar_excel, bootstyle="secondary").pack(pady=5)
 
 
     root = ttk.Window(themename="darkly")
     root.title("Calculadora de Fotocopias")
-    root.geometry("800x600")
+    root.geometry("800x760")
 
 
     marco_superior = ttk.Frame(root)
@@ -513,12 +2735,20 @@ def menu_interactivo():
     marco_opciones.pack(pady=10)
 
     ttk.Label(marco_opciones, text="Archivos seleccionados:").grid(row=0, column=0, sticky="w")
-    rutas_var = StringVar()
-    entry_rutas = ttk.Entry(marco_opciones, textvariable=rutas_var, width=60, state='readonly')
-    entry_rutas.grid(row=1, column=0, padx=5, pady=5, sticky="we")
+    lista_seleccion = ttk.Treeview(marco_opciones, columns=("paginas", "estado"), height=5)
+    lista_seleccion.heading("#0", text="Archivo")
+    lista_seleccion.heading("paginas", text="Páginas")
+    lista_seleccion.heading("estado", text="Estado")
+    lista_seleccion.column("#0", width=340)
+    lista_seleccion.column("paginas", width=70, anchor="e")
+    lista_seleccion.column("estado", width=90)
+    lista_seleccion.grid(row=1, column=0, rowspan=2, padx=5, pady=5, sticky="we")
+
+    btn_seleccionar = ttk.Button(marco_opciones, text="Agregar Archivos", command=seleccionar_archivos)
+    btn_seleccionar.grid(row=1, column=1, padx=5, pady=5, sticky="we")
 
-    btn_seleccionar = ttk.Button(marco_opciones, text="Seleccionar Archivos", command=seleccionar_archivos)
-    btn_seleccionar.grid(row=1, column=1, padx=5, pady=5)
+    btn_quitar = ttk.Button(marco_opciones, text="Quitar", command=quitar_archivos, bootstyle="secondary")
+    btn_quitar.grid(row=2, column=1, padx=5, pady=5, sticky="we")
 
     marco_opciones_extra = ttk.Frame(root)
     marco_opciones_extra.pack(pady=10)
@@ -527,44 +2757,63 @@ def menu_interactivo():
     opcion_anillado = IntVar()
 
     
-    chk_anillado = ttk.Checkbutton(root, text="Anillado", variable=opcion_anillado)
+    chk_anillado = ttk.Checkbutton(root, text="Anillado", variable=opcion_anillado, command=recotizar)
     chk_anillado.pack(pady=5)
 
 
     opcion_doble_faz = IntVar()
-    chk_doble_faz = ttk.Checkbutton(marco_opciones_extra, text="Doble Faz", variable=opcion_doble_faz)
+    chk_doble_faz = ttk.Checkbutton(marco_opciones_extra, text="Doble Faz", variable=opcion_doble_faz, command=recotizar)
     chk_doble_faz.grid(row=0, column=0, padx=10, pady=5)
 
     opcion_usuario = IntVar()
-    rad_publico = ttk.Radiobutton(marco_opciones_extra, text="Público", variable=opcion_usuario, value=0)
+    rad_publico = ttk.Radiobutton(marco_opciones_extra, text="Público", variable=opcion_usuario, value=0, command=recotizar)
     rad_publico.grid(row=0, column=1, padx=10, pady=5)
-    rad_estudiante = ttk.Radiobutton(marco_opciones_extra, text="Estudiante", variable=opcion_usuario, value=1)
+    rad_estudiante = ttk.Radiobutton(marco_opciones_extra, text="Estudiante", variable=opcion_usuario, value=1, command=recotizar)
     rad_estudiante.grid(row=0, column=2, padx=10, pady=5)
 
     opcion_color = IntVar()
-    chk_color = ttk.Checkbutton(marco_opciones_extra, text="Color", variable=opcion_color)
+    chk_color = ttk.Checkbutton(marco_opciones_extra, text="Color", variable=opcion_color, command=cambiar_color)
     chk_color.grid(row=0, column=3, padx=10, pady=5)
 
 
     btn_calcular = ttk.Button(root, text="Calcular", command=calcular, bootstyle="primary")
     btn_calcular.pack(pady=10)
 
+    # Total de la última cotización; se actualiza al cambiar las opciones
+    label_total = ttk.Label(root, text="", font=("Arial", 14, "bold"))
+    label_total.pack(pady=5)
+
     
     btn_manual = ttk.Button(root, text="Calcular Manualmente", command=mostrar_ventana_manual, bootstyle="secondary")
     btn_manual.pack(pady=5)
 
-    btn_convertir_pdf = ttk.Button(root, text="Convertir a PDF", command=convertir_a_pdf, bootstyle="secondary")
+    btn_convertir_pdf = ttk.Button(root, text="Convertir a PDF", command=convertir_archivos_a_pdf, bootstyle="secondary")
     btn_convertir_pdf.pack(pady=5)
 
     btn_ajustes = ttk.Button(root, text="Ajustes Avanzados", command=mostrar_ventana_ajustes, bootstyle="secondary")
     btn_ajustes.pack(pady=5)
 
+    btn_calibrar = ttk.Button(root, text="Calibrar Sensibilidad", command=mostrar_ventana_calibracion, bootstyle="secondary")
+    btn_calibrar.pack(pady=5)
+
     btn_editar_precios = ttk.Button(root, text="Editar Precios", command=mostrar_ventana_editar_precios, bootstyle="secondary")
     btn_editar_precios.pack(pady=5)
 
     btn_salir = ttk.Button(root, text="Salir", command=salir, bootstyle="danger")
     btn_salir.pack(pady=10)
 
+    if os.environ.get("LECTOR_MEDIR_ARRANQUE"):
+        # Usado por benchmarks/arranque.py: avisar apenas la ventana está dibujada y cerrar
+        def ventana_lista():
+            root.update_idletasks()
+            print("ventana lista", flush=True)
+            root.destroy()
+        root.after_idle(ventana_lista)
+
     root.mainloop()
 
-menu_interactivo()
\ No newline at end of file
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Necesario para el pool de procesos en el ejecutable de PyInstaller
+    if len(sys.argv) > 1:
+        sys.exit(main_cli(sys.argv[1:]))
+    menu_interactivo()
\ No newline at end of file
@@ -0,0 +1,53 @@
+# Configuración común de los tests (python -m pytest desde la raíz del repositorio)
+#
+# lector lee precios.json (o importa precios.xlsx) y guarda la caché de color en la carpeta
+# actual, así que los tests corren en una carpeta temporal vacía: usan los precios por defecto
+# y no tocan los archivos del local.
+import os
+import shutil
+import sys
+import tempfile
+
+import fitz  # PyMuPDF
+import pytest
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_REPO not in sys.path:
+    sys.path.insert(0, RAIZ_REPO)
+
+_carpeta_anterior = None
+_carpeta_tests = None
+
+
+def pytest_configure(config):
+    global _carpeta_anterior, _carpeta_tests
+    _carpeta_anterior = os.getcwd()
+    _carpeta_tests = tempfile.mkdtemp(prefix="lector_tests_")
+    os.chdir(_carpeta_tests)
+
+
+def pytest_unconfigure(config):
+    os.chdir(_carpeta_anterior)
+    shutil.rmtree(_carpeta_tests, ignore_errors=True)
+
+
+# Cada test con su propia caché de color
+@pytest.fixture(autouse=True)
+def cache_temporal(tmp_path, monkeypatch):
+    import lector
+
+    monkeypatch.setattr(lector, "CACHE_PATH", str(tmp_path / "cache_color.sqlite"))
+
+
+# Arma un PDF en ruta con una página por entrada de paginas. Cada página es None (en blanco) o
+# la fracción de la página (desde arriba, a todo el ancho) que se pinta de rojo.
+def crear_pdf(ruta, paginas):
+    with fitz.open() as doc:
+        for fraccion in paginas:
+            pagina = doc.new_page()
+            if fraccion:
+                rect = pagina.rect
+                pagina.draw_rect(fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * fraccion),
+                                 color=None, fill=(1, 0, 0))
+        doc.save(ruta)
+    return str(ruta)
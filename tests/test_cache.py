@@ -0,0 +1,96 @@
+import numpy as np
+
+import lector
+from conftest import crear_pdf
+
+
+# Páginas inventadas para guardar en la caché, con histogramas de ruido (no se comprimen) para
+# que ocupen lugar
+def paginas_de_prueba(cantidad, semilla):
+    generador = np.random.default_rng(semilla)
+    return {
+        pagina: (0.5, 595.0, 842.0, 0.5, 0.5, generador.integers(0, 2**32, 256, dtype=np.uint32))
+        for pagina in range(cantidad)
+    }
+
+
+def hashes_guardados(conexion):
+    return {hash_pdf for hash_pdf, in conexion.execute("SELECT DISTINCT hash FROM paginas")}
+
+
+def ocupado_mb(conexion):
+    paginas_db = conexion.execute("PRAGMA page_count").fetchone()[0]
+    paginas_libres = conexion.execute("PRAGMA freelist_count").fetchone()[0]
+    return (paginas_db - paginas_libres) * conexion.execute("PRAGMA page_size").fetchone()[0] / 2**20
+
+
+def test_guardar_y_leer():
+    conexion = lector.abrir_cache()
+    paginas = paginas_de_prueba(3, 0)
+    lector.guardar_cache(conexion, "a", 50, 36, paginas)
+    leidas = lector.leer_cache(conexion, "a", 50, 36)
+    assert leidas.keys() == paginas.keys()
+    for pagina, datos in paginas.items():
+        assert leidas[pagina][:5] == datos[:5]
+        assert np.array_equal(leidas[pagina][5], datos[5])
+    assert lector.leer_cache(conexion, "a", 50, 72) == {}
+    conexion.close()
+
+
+def test_recorte_borra_las_paginas_usadas_hace_mas_tiempo(monkeypatch):
+    conexion = lector.abrir_cache()
+    for i, hash_pdf in enumerate(("viejo", "medio", "nuevo")):
+        lector.guardar_cache(conexion, hash_pdf, 50, 36, paginas_de_prueba(200, i))
+        with conexion:
+            conexion.execute("UPDATE paginas SET ultimo_uso = ? WHERE hash = ?", (i, hash_pdf))
+    # Leer "viejo" lo vuelve el más reciente
+    lector.leer_cache(conexion, "viejo", 50, 36)
+
+    # Un techo que alcanza para poco más de un documento
+    monkeypatch.setattr(lector, "cache_max_mb", ocupado_mb(conexion) * 0.4)
+    lector.recortar_cache(conexion)
+
+    assert ocupado_mb(conexion) <= lector.cache_max_mb
+    # Se van primero las de "medio", después las de "nuevo"; las de "viejo" quedan
+    assert hashes_guardados(conexion) == {"viejo"}
+    conexion.close()
+
+
+def test_recorte_sin_exceso_no_borra(monkeypatch):
+    monkeypatch.setattr(lector, "cache_max_mb", 50)
+    conexion = lector.abrir_cache()
+    lector.guardar_cache(conexion, "a", 50, 36, paginas_de_prueba(10, 0))
+    assert conexion.execute("SELECT COUNT(*) FROM paginas").fetchone()[0] == 10
+    conexion.close()
+
+
+def test_cambio_de_version_descarta_la_cache(monkeypatch):
+    conexion = lector.abrir_cache()
+    lector.guardar_cache(conexion, "a", 50, 36, paginas_de_prueba(3, 0))
+    conexion.close()
+
+    monkeypatch.setattr(lector, "CACHE_VERSION", lector.CACHE_VERSION + 1)
+    conexion = lector.abrir_cache()
+    assert conexion.execute("PRAGMA user_version").fetchone()[0] == lector.CACHE_VERSION
+    assert lector.leer_cache(conexion, "a", 50, 36) == {}
+    conexion.close()
+
+
+def test_otra_sensibilidad_se_recalcula_desde_el_histograma():
+    histograma = np.zeros(256, dtype=np.uint32)
+    histograma[[0, 40, 200]] = (70, 20, 10)
+    conexion = lector.abrir_cache()
+    lector.guardar_cache(conexion, "a", 50, 36, {0: (0.1, 595.0, 842.0, 0.1, 0.1, histograma)})
+    porcentaje = lector.leer_cache(conexion, "a", 30, 36)[0][0]
+    assert porcentaje == lector.fraccion_desde_histograma(histograma, 30)
+    conexion.close()
+
+
+def test_analizar_pdfs_reutiliza_la_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(lector, "muestreo_desde", 0)
+    ruta = crear_pdf(tmp_path / "a.pdf", [None, 1.0, 0.5])
+    primero, conteo = lector.analizar_pdfs([ruta], procesos=1)
+    assert conteo["cache"] == 0
+    segundo, conteo = lector.analizar_pdfs([ruta], procesos=1)
+    assert conteo["cache"] == 3
+    assert np.array_equal(primero[ruta].color, segundo[ruta].color)
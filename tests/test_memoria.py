@@ -0,0 +1,53 @@
+import pytest
+
+import lector
+
+
+@pytest.fixture
+def memoria(monkeypatch):
+    # Memoria residente simulada; vaciar la caché de MuPDF la baja a lo que indique "tras_liberar"
+    estado = {"residente": 0.0, "tras_liberar": 0.0, "liberaciones": 0}
+
+    def vaciar():
+        estado["liberaciones"] += 1
+        estado["residente"] = estado["tras_liberar"]
+
+    monkeypatch.setattr(lector, "memoria_residente_mb", lambda pid=None: estado["residente"])
+    monkeypatch.setattr(lector, "vaciar_cache_mupdf", vaciar)
+    monkeypatch.setattr(lector, "_residente_tras_liberar", 0.0)
+    return estado
+
+
+def test_memoria_residente_del_proceso():
+    assert lector.memoria_residente_mb() > 0
+
+
+def test_sin_techo_no_libera(memoria):
+    memoria["residente"] = 10_000
+    assert not lector.respetar_techo_memoria(0)
+    assert memoria["liberaciones"] == 0
+
+
+def test_libera_al_pasar_el_techo(memoria):
+    memoria["residente"], memoria["tras_liberar"] = 400, 150
+    assert not lector.respetar_techo_memoria(512)
+    memoria["residente"] = 520
+    assert lector.respetar_techo_memoria(512)
+    assert memoria["residente"] == 150
+    # De vuelta bajo el techo, se libera otra vez recién al pasarlo
+    memoria["residente"] = 500
+    assert not lector.respetar_techo_memoria(512)
+    memoria["residente"] = 513
+    assert lector.respetar_techo_memoria(512)
+    assert memoria["liberaciones"] == 2
+
+
+def test_techo_por_debajo_del_proceso_no_libera_en_cada_pagina(memoria):
+    memoria["residente"], memoria["tras_liberar"] = 160, 150
+    assert lector.respetar_techo_memoria(50)
+    for residente in (150, 160, 150 + lector.HISTERESIS_TECHO_MB):
+        memoria["residente"] = residente
+        assert not lector.respetar_techo_memoria(50)
+    memoria["residente"] = 151 + lector.HISTERESIS_TECHO_MB
+    assert lector.respetar_techo_memoria(50)
+    assert memoria["liberaciones"] == 2
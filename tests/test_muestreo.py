@@ -0,0 +1,93 @@
+import math
+
+import pytest
+
+import lector
+from conftest import crear_pdf
+
+
+def test_elegir_muestra_cubre_el_documento_en_tramos():
+    estratos = lector.elegir_muestra(100, 10, semilla=1)
+    assert len(estratos) == 5
+    assert estratos[0][0] == 0 and estratos[-1][1] == 100
+    for (_, fin, _), (inicio, _, _) in zip(estratos, estratos[1:]):
+        assert fin == inicio
+    for inicio, fin, elegidas in estratos:
+        assert len(elegidas) == 2 and elegidas == sorted(set(elegidas))
+        assert all(inicio <= i < fin for i in elegidas)
+
+
+def test_elegir_muestra_depende_solo_de_la_semilla():
+    assert lector.elegir_muestra(500, 60, 7) == lector.elegir_muestra(500, 60, 7)
+    assert lector.elegir_muestra(500, 60, 7) != lector.elegir_muestra(500, 60, 8)
+
+
+@pytest.mark.parametrize("num_paginas", [1, 9, 10])
+def test_elegir_muestra_no_muestrea_si_seria_todo_el_documento(num_paginas):
+    assert lector.elegir_muestra(num_paginas, 10, semilla=1) is None
+
+
+def test_promedio_estratificado_valores_conocidos():
+    estratos = [(0, 4, [0, 1]), (4, 8, [4, 5])]
+    promedio, margen = lector.promedio_estratificado(estratos, {0: 0.0, 1: 1.0, 4: 2.0, 5: 4.0})
+    assert promedio == pytest.approx(0.5 * 0.5 + 0.5 * 3.0)
+    # Varianza de cada tramo: peso² · (1 - n/N) · s² / n
+    varianza = 0.25 * 0.5 * 0.5 / 2 + 0.25 * 0.5 * 2.0 / 2
+    assert margen == pytest.approx(1.96 * math.sqrt(varianza))
+
+
+def test_promedio_estratificado_tramos_censados_no_tienen_margen():
+    # Tramos de dos páginas: se analizaron todas, la corrección por población finita anula el margen
+    promedio, margen = lector.promedio_estratificado([(0, 2, [0, 1]), (2, 4, [2, 3])], [0.0, 1.0, 0.2, 0.6])
+    assert promedio == pytest.approx(0.45)
+    assert margen == 0
+
+
+def test_estimar_color_documento_parejo():
+    estratos = lector.elegir_muestra(40, 10, semilla=3)
+    estimacion = lector.estimar_color(estratos, [0.3] * 40)
+    assert estimacion["promedio"] == pytest.approx(0.3)
+    assert estimacion["minimo"] == pytest.approx(0.3) and estimacion["maximo"] == pytest.approx(0.3)
+    recargo = lector.tabla_precios.bandas_color([0.3])[1][0]
+    assert estimacion["recargo"] == estimacion["recargo_minimo"] == estimacion["recargo_maximo"] == recargo
+    assert not lector.muestra_insuficiente(estimacion, 40)
+
+
+def test_muestra_insuficiente_con_margen_grande(monkeypatch):
+    monkeypatch.setattr(lector, "tolerancia_muestreo", 0.05)
+    estimacion = {"recargo": 100.0, "recargo_maximo": 110.0}
+    # Base de 40 páginas al público: 50; el margen (10) es más del 5% de 150
+    assert lector.muestra_insuficiente(estimacion, 40)
+    monkeypatch.setattr(lector, "tolerancia_muestreo", 0.1)
+    assert not lector.muestra_insuficiente(estimacion, 40)
+
+
+@pytest.fixture
+def muestreo(monkeypatch):
+    monkeypatch.setattr(lector, "muestreo_desde", 20)
+    monkeypatch.setattr(lector, "muestreo_paginas", 10)
+
+
+def test_documento_parejo_se_estima_por_muestreo(tmp_path, muestreo):
+    ruta = crear_pdf(tmp_path / "parejo.pdf", [0.5] * 30)
+    analisis = lector.analizar_pdfs([ruta], procesos=1)[0][ruta]
+    assert analisis.muestreo is not None
+    assert analisis.num_paginas == 30
+    assert len(analisis.color) == 10
+    assert sum(analisis.pesos) == pytest.approx(30)
+
+
+def test_muestra_insuficiente_analiza_el_documento_entero(tmp_path, muestreo):
+    # Páginas en blanco y todas rojas alternadas: cada tramo de la muestra tiene recargos muy distintos
+    ruta = crear_pdf(tmp_path / "mezcla.pdf", [None, 1.0] * 15)
+    analisis = lector.analizar_pdfs([ruta], procesos=1)[0][ruta]
+    assert analisis.muestreo is None
+    assert analisis.paginas.tolist() == list(range(30))
+    assert [round(fraccion) for fraccion in analisis.color] == [0, 1] * 15
+
+
+def test_documento_chico_no_se_muestrea(tmp_path, muestreo):
+    ruta = crear_pdf(tmp_path / "chico.pdf", [0.5] * 19)
+    analisis = lector.analizar_pdfs([ruta], procesos=1)[0][ruta]
+    assert analisis.muestreo is None
+    assert len(analisis.color) == 19
@@ -0,0 +1,143 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import lector
+from conftest import RAIZ_REPO, crear_pdf
+
+PUBLICO = {"simple": {1: 100, 2: 80, 30: 70, 80: 50}, "doble": {1: 100, 30: 80}}
+ESTUDIANTE = {"simple": {1: 80, 10: 70}, "doble": {1: 100}}
+COLOR = {0.0: 100, 0.05: 150, 0.25: 250, 0.5: 400, 0.75: 600}
+
+
+@pytest.fixture
+def tabla(monkeypatch):
+    tabla = lector.TablaPrecios(PUBLICO, ESTUDIANTE, COLOR)
+    monkeypatch.setattr(lector, "tabla_precios", tabla)
+    return tabla
+
+
+@pytest.mark.parametrize("cantidad, precio", [(0, None), (1, 100), (2, 80), (29, 80), (30, 70), (79, 70), (80, 50), (10_000, 50)])
+def test_precio_base_en_los_limites_de_los_tramos(tabla, cantidad, precio):
+    assert tabla.precio_base(cantidad, "simple", "publico") == precio
+
+
+def test_precio_base_por_usuario(tabla):
+    assert tabla.precio_base(10, "simple", "estudiante") == 70
+    assert tabla.precio_base(10, "doble", "publico") == 100
+    assert lector.obtener_precio(0, "simple", "publico") == 0
+
+
+def test_bandas_color_en_los_umbrales(tabla):
+    fracciones = [0.0, 0.0499, 0.05, 0.2499, 0.25, 0.5, 0.7499, 0.75, 1.0]
+    bandas, recargos = tabla.bandas_color(fracciones)
+    assert bandas.tolist() == [0, 0, 1, 1, 2, 3, 3, 4, 4]
+    assert recargos.tolist() == [100, 100, 150, 150, 250, 400, 400, 600, 600]
+
+
+def test_bandas_color_debajo_del_primer_umbral():
+    tabla = lector.TablaPrecios(PUBLICO, ESTUDIANTE, {0.1: 200})
+    bandas, recargos = tabla.bandas_color([0.0, 0.0999, 0.1])
+    assert bandas.tolist() == [-1, -1, 0]
+    assert recargos.tolist() == [0, 0, 200]
+
+
+def test_bandas_color_sin_bandas():
+    bandas, recargos = lector.TablaPrecios(PUBLICO, ESTUDIANTE, {}).bandas_color([0.0, 1.0])
+    assert bandas.tolist() == [-1, -1]
+    assert recargos.tolist() == [0, 0]
+
+
+def test_nombre_banda(tabla):
+    assert tabla.nombre_banda(1) == "5-25%"
+    assert tabla.nombre_banda(4) == "75% o más"
+
+
+def test_calcular_costos_a_color_por_pagina(tabla):
+    analisis = lector.AnalisisPDF("a.pdf", [0.0, 0.05, 0.75], [595] * 3, [842] * 3, 36, 50)
+    total, detalles, desglose = lector.calcular_costos([analisis], color=True)
+    # 3 páginas: precio base 80 por página más el recargo de la banda de cada una
+    assert desglose["a.pdf"][2].tolist() == [180, 230, 680]
+    assert detalles == {"a.pdf": (3, 1090)}
+    assert total == 1090
+
+
+def test_calcular_costos_a_color_con_pesos_de_muestreo(tabla):
+    analisis = lector.AnalisisPDF("a.pdf", [0.0, 0.75], [595] * 2, [842] * 2, 36, 50,
+                                  paginas=[0, 50], pesos=[50, 50], total_paginas=100, muestreo={})
+    total, detalles, _ = lector.calcular_costos([analisis], color=True)
+    # 100 páginas: precio base 50; 50 páginas con recargo 100 y 50 con recargo 600
+    assert detalles == {"a.pdf": (100, 50 * 150 + 50 * 650)}
+    assert total == 40_000
+
+
+def test_calcular_costos_a_color_exige_analisis_de_color(tabla):
+    solo_paginas = lector.AnalisisPDF("a.pdf", (), (), (), 36, 50, total_paginas=3, con_color=False)
+    with pytest.raises(ValueError):
+        lector.calcular_costos([solo_paginas], color=True)
+
+
+def test_calcular_costos_blanco_y_negro_doble_faz(tabla):
+    archivos = [lector.AnalisisPDF(ruta, (), (), (), 36, 50, total_paginas=n, con_color=False)
+                for ruta, n in (("a.pdf", 3), ("b.pdf", 28))]
+    total, detalles, desglose = lector.calcular_costos(archivos, doble_faz=True)
+    # 31 páginas doble faz son 16 hojas: tramo de 1 (100 por hoja)
+    assert detalles == {"a.pdf": (3, 200), "b.pdf": (28, 1400)}
+    assert total == 1600
+    assert desglose == {}
+
+
+# La línea de comandos corre en un proceso aparte, en una carpeta sin precios.json: precios por defecto
+def correr_cli(carpeta, *argumentos):
+    proceso = subprocess.run(
+        [sys.executable, os.path.join(RAIZ_REPO, "lector.py"), *argumentos],
+        cwd=carpeta, capture_output=True, text=True, timeout=120,
+    )
+    assert proceso.returncode == 0, proceso.stderr
+    return proceso
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    # a.pdf: una página en blanco, una toda roja y una con un tercio rojo; b.pdf: una en blanco
+    return (crear_pdf(tmp_path / "a.pdf", [None, 1.0, 1 / 3]), crear_pdf(tmp_path / "b.pdf", [None]))
+
+
+def test_cli_json_a_color(tmp_path, pdfs):
+    correr_cli(tmp_path, pdfs[0], "--color", "--procesos", "1", "-o", "cotizacion.json")
+    with open(tmp_path / "cotizacion.json", encoding="utf-8") as f:
+        cotizacion = json.load(f)
+    archivo, = cotizacion["archivos"]
+    assert archivo["paginas"] == 3
+    assert archivo["bandas_color"] == [0, 4, 2]
+    # Precio base de 3 páginas al público: 80; recargos 100, 600 y 250
+    assert archivo["precios_paginas"] == [180, 680, 330]
+    assert archivo["costo"] == cotizacion["total"] == 1190
+    assert cotizacion["opciones"] == {"doble_faz": False, "usuario": "publico", "color": True, "anillado": False}
+    assert sum(cotizacion["paginas_por_metodo"].values()) == 3
+
+
+def test_cli_csv_blanco_y_negro_con_anillado(tmp_path, pdfs):
+    correr_cli(tmp_path, *pdfs, "--anillado", "--formato", "csv", "-o", "cotizacion.csv")
+    with open(tmp_path / "cotizacion.csv", encoding="utf-8", newline="") as f:
+        filas = list(csv.reader(f))
+    assert filas == [
+        ["archivo", "paginas", "costo", "estimado"],
+        [pdfs[0], "3", "240", "no"],
+        [pdfs[1], "1", "80", "no"],
+        ["ANILLADO", "", "800"],
+        ["TOTAL", "4", "1120"],
+    ]
+
+
+def test_cli_salida_estandar(tmp_path, pdfs):
+    proceso = correr_cli(tmp_path, pdfs[1], "--doble-faz", "--estudiante")
+    # PyMuPDF puede escribir un aviso al importarse: el JSON es lo último de la salida
+    cotizacion = json.loads(proceso.stdout[proceso.stdout.index("{"):])
+    assert cotizacion["total"] == 100
+    assert cotizacion["archivos"][0]["paginas"] == 1
+
@@ -0,0 +1,106 @@
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+
+import lector
+from conftest import crear_pdf
+
+
+# Página de 200 x 200 puntos con el flujo de contenido dado
+def pagina_con_contenido(doc, contenido):
+    pagina = doc.new_page(width=200, height=200)
+    pagina.draw_rect(fitz.Rect(0, 0, 1, 1), color=None, fill=(0, 0, 0))  # Crea el flujo de contenido
+    doc.update_stream(pagina.get_contents()[0], contenido)
+    return pagina
+
+
+@pytest.mark.parametrize("contenido", [
+    b"",
+    b"0 g 0 0 100 100 re f",
+    b"0.5 0.5 0.5 rg 0.2 0.2 0.2 RG 0 0 100 100 re B",
+    b"0 0 0 1 k 0 0 0 .5 K 0 0 100 100 re B",
+    b"/DeviceRGB cs 0.3 0.3 0.3 sc /DeviceGray CS 0.7 SCN 0 0 100 100 re B",
+    b"BT /F1 12 Tf 10 10 Td [<746578746f>]TJ ET",
+])
+def test_contenido_gris(contenido):
+    assert lector.contenido_es_gris(contenido)
+
+
+@pytest.mark.parametrize("contenido", [
+    b"1 0 0 rg 0 0 100 100 re f",
+    b"0 0 0 rg\n0 0 100 100 re f\n0 0 1 RG 0 0 m 10 10 l S",
+    b"0 1 0 0 k 0 0 100 100 re f",
+    b"/CS0 cs 0.5 sc 0 0 100 100 re f",  # Espacio de color de un recurso (ICC, Separation...)
+    b"/DeviceRGB cs 1 0 0 sc 0 0 100 100 re f",
+    b"/Pattern cs /P0 scn 0 0 100 100 re f",
+    b"q 100 0 0 100 0 0 cm BI /W 1 /H 1 /CS /G /BPC 8 ID \x80 EI Q",
+    b"/Sh0 sh",
+    # Un texto que parece un operador de color hace renderizar de más, nunca de menos
+    b"BT /F1 12 Tf 10 10 Td (rojo 1 0 0 rg) Tj ET",
+])
+def test_contenido_no_gris(contenido):
+    assert not lector.contenido_es_gris(contenido)
+
+
+def test_pagina_con_imagen_en_linea_a_color():
+    with fitz.open() as doc:
+        # Imagen en línea RGB de 2x2 píxeles rojos sobre el 32% de la página, sin XObject
+        pixeles = b"\xff\x00\x00" * 4
+        contenido = b"q 160 0 0 80 0 0 cm BI /W 2 /H 2 /CS /RGB /BPC 8 ID " + pixeles + b"\nEI Q"
+        pagina = pagina_con_contenido(doc, contenido)
+        assert pagina.get_images(full=True) == []  # get_images no la ve
+        assert not lector.pagina_es_monocromatica(pagina)
+        porcentaje, metodo, *_ = lector.analizar_pagina_con_tamano(pagina, 36, 50)
+        assert metodo == "raster"
+        assert porcentaje == pytest.approx(0.32, abs=0.01)
+
+
+def test_formulario_con_color():
+    with fitz.open() as doc:
+        with fitz.open() as origen:
+            roja = origen.new_page(width=200, height=200)
+            roja.draw_rect(fitz.Rect(0, 0, 100, 100), color=None, fill=(1, 0, 0))
+            pagina = doc.new_page(width=200, height=200)
+            pagina.show_pdf_page(pagina.rect, origen, 0)  # La página roja entra como XObject
+        assert pagina.get_xobjects()
+        assert not lector.pagina_es_monocromatica(pagina)
+
+
+def test_imagen_gris_y_texto_negro():
+    with fitz.open() as doc:
+        pagina = doc.new_page(width=200, height=200)
+        gris = fitz.Pixmap(fitz.csGRAY, 4, 4, bytes(range(0, 256, 16)), False)
+        pagina.insert_image(fitz.Rect(0, 0, 100, 100), pixmap=gris)
+        pagina.insert_text((20, 150), "texto negro", fontsize=12)
+        assert lector.pagina_es_monocromatica(pagina)
+        pagina.insert_text((20, 180), "texto azul", fontsize=12, color=(0, 0, 1))
+        assert not lector.pagina_es_monocromatica(pagina)
+
+
+def test_imagen_a_color():
+    with fitz.open() as doc:
+        pagina = doc.new_page(width=200, height=200)
+        roja = fitz.Pixmap(fitz.csRGB, 2, 2, b"\xff\x00\x00" * 4, False)
+        pagina.insert_image(fitz.Rect(0, 0, 100, 100), pixmap=roja)
+        assert not lector.pagina_es_monocromatica(pagina)
+
+
+def test_anotacion_obliga_a_renderizar():
+    with fitz.open() as doc:
+        pagina = doc.new_page(width=200, height=200)
+        pagina.add_highlight_annot(fitz.Rect(10, 10, 100, 30))
+        assert not lector.pagina_es_monocromatica(pagina)
+
+
+def test_paginas_grises_no_se_renderizan(tmp_path):
+    ruta = crear_pdf(tmp_path / "a.pdf", [None, 1.0])
+    analisis, conteo = lector.analizar_pdfs([ruta], procesos=1, usar_cache=False)
+    assert conteo["vectorial"] == 1 and conteo["raster"] == 1
+    assert np.allclose(analisis[ruta].color, [0.0, 1.0])
+
+
+def test_sensibilidad_cero_siempre_renderiza():
+    with fitz.open() as doc:
+        pagina = pagina_con_contenido(doc, b"0 g 0 0 100 100 re f")
+        assert lector.es_gris_sin_renderizar(pagina, 50)
+        assert not lector.es_gris_sin_renderizar(pagina, 0)